@@ -1,10 +1,12 @@
 import streamlit as st
-import matplotlib.pyplot as plt
+from betting import compile_bets, season_outcome, settle
+from bracket import render_bracket
+from cache import ResultCache, cache_key
+from service import call_or_run
 from simulator import (
-    simulate_season,
-    simulate_playoffs,
-    draw_nba_bracket,
-    calculate_odds,
+    odds_from_probability,
+    stream_season_odds,
+    league_config,
 )
 
 st.set_page_config(
@@ -14,22 +16,23 @@ st.set_page_config(
 )
 
 # Define utility functions here
-def extract_teams(bracket_side):
-    team_set = set()
-    for item in bracket_side:
-        if isinstance(item, (list, tuple)):
-            for subitem in item:
-                if isinstance(subitem, (list, tuple)):
-                    team_set.update(subitem)
-                else:
-                    team_set.add(subitem)
-        else:
-            team_set.add(item)
-    return list(team_set)
-
-def format_team_display(name, stats, seed, in_playoffs):
-    odds = calculate_odds(name, seed)
-    odds_pct = 100 / odds if odds > 0 else 0
+def bracket_seeds(rounds):
+    first_round = rounds[0]
+    return [match[0] for match in first_round] + [match[1] for match in reversed(first_round)]
+
+def projection_table(snapshot):
+    champion = snapshot["estimates"]["champion"]
+    low, high = snapshot["intervals"]["champion"]
+    order = sorted(range(len(snapshot["teams"])), key=lambda i: -champion[i])
+    return {
+        "Team": [snapshot["teams"][i] for i in order],
+        "Playoffs %": [round(100 * snapshot["estimates"]["playoffs"][i], 1) for i in order],
+        "Title %": [round(100 * champion[i], 2) for i in order],
+        "Title ± %": [round(50 * (high[i] - low[i]), 2) for i in order],
+    }
+
+def format_team_display(name, stats, seed, in_playoffs, title_odds):
+    odds_pct = 100 * title_odds.get(name, 0.0)
     color = "red" if in_playoffs else "black"
     return f"<span style='color: {color};'>{seed}. {name} ({stats['W']} W - {stats['L']} L, {odds_pct:.1f}% to win)</span>"
 
@@ -57,11 +60,12 @@ if st.button("Start Simulation"):
             "Seattle Ringers", "Minneapolis Hunters", "Phoenix Rosebuds", "Omaha Crows"
         ]
 
-        standings, bracket_data, _ = simulate_season(eastern_teams, western_teams)
+        standings, bracket_data, _ = call_or_run("simulate_season", eastern_teams=eastern_teams,
+                                                 western_teams=western_teams)
         st.session_state.standings = standings
         st.session_state.bracket_data = bracket_data
-        st.session_state.east_top = extract_teams(bracket_data["east"])
-        st.session_state.west_top = extract_teams(bracket_data["west"])
+        st.session_state.east_top = bracket_seeds(bracket_data["east"])
+        st.session_state.west_top = bracket_seeds(bracket_data["west"])
         st.session_state.final_champion = None
         st.session_state.final_bracket = None
 
@@ -69,9 +73,10 @@ if st.button("Start Simulation"):
 
 # Display standings and betting options
 if "standings" in st.session_state and st.session_state.standings:
-    standings_dict = {team["name"]: team for team in st.session_state.standings}
-    east_results = {team: standings_dict[team] for team in standings_dict if standings_dict[team]["conference"] == "East"}
-    west_results = {team: standings_dict[team] for team in standings_dict if standings_dict[team]["conference"] == "West"}
+    east_standings = [team for team in st.session_state.standings if team["conference"] == "East"]
+    west_standings = [team for team in st.session_state.standings if team["conference"] == "West"]
+
+    title_odds = call_or_run("championship_odds", east=st.session_state.east_top, west=st.session_state.west_top)
 
     st.subheader("🏆 Regular Season Results")
     st.markdown("_Red = Playoffs_")
@@ -80,38 +85,37 @@ if "standings" in st.session_state and st.session_state.standings:
 
     with col1:
         st.markdown("### Eastern Conference")
-        sorted_east = sorted(east_results.items(), key=lambda x: x[1]["W"], reverse=True)
-        for i, (team, stats) in enumerate(sorted_east, start=1):
-            in_playoffs = team in st.session_state.east_top
-            st.markdown(format_team_display(team, stats, seed=i, in_playoffs=in_playoffs), unsafe_allow_html=True)
+        for i, stats in enumerate(east_standings, start=1):
+            in_playoffs = stats["name"] in st.session_state.east_top
+            st.markdown(format_team_display(stats["name"], stats, seed=i, in_playoffs=in_playoffs, title_odds=title_odds), unsafe_allow_html=True)
 
     with col2:
         st.markdown("### Western Conference")
-        sorted_west = sorted(west_results.items(), key=lambda x: x[1]["W"], reverse=True)
-        for i, (team, stats) in enumerate(sorted_west, start=1):
-            in_playoffs = team in st.session_state.west_top
-            st.markdown(format_team_display(team, stats, seed=i, in_playoffs=in_playoffs), unsafe_allow_html=True)
+        for i, stats in enumerate(west_standings, start=1):
+            in_playoffs = stats["name"] in st.session_state.west_top
+            st.markdown(format_team_display(stats["name"], stats, seed=i, in_playoffs=in_playoffs, title_odds=title_odds), unsafe_allow_html=True)
 
     # Betting UI
     st.subheader("💰 Place Your Bet!")
     playoff_teams = st.session_state.east_top + st.session_state.west_top
     bet_team = st.selectbox("Pick a team to bet on:", playoff_teams)
-    seed = playoff_teams.index(bet_team) + 1
-    odds = calculate_odds(bet_team, seed)
+    odds = odds_from_probability(title_odds[bet_team])
     st.write(f"**Bet Odds for {bet_team}: x{odds} payout**")
     bet_amount = st.number_input(f"How much do you want to bet on {bet_team}?", min_value=0.0, step=1.0)
 
     if st.button("Simulate Playoffs"):
         with st.spinner("Simulating playoffs..."):
-            final_matchup, final_champion, final_bracket = simulate_playoffs(
-                st.session_state.east_top, st.session_state.west_top
+            final_matchup, final_champion, final_bracket = call_or_run(
+                "simulate_playoffs", east=st.session_state.east_top, west=st.session_state.west_top
             )
             st.session_state.final_champion = final_champion
             st.session_state.final_bracket = final_bracket
             st.success(f"The champion is **{final_champion}**!")
 
+            bet = compile_bets([{"bettor": "you", "market": "champion", "team": bet_team, "stake": bet_amount,
+                                 "odds": odds}], playoff_teams)
             if final_champion == bet_team:
-                winnings = round(bet_amount * odds, 2)
+                winnings = round(float(settle(bet, season_outcome(playoff_teams, final_bracket))[0, 0]), 2)
                 st.balloons()
                 st.success(f"You won your bet on **{final_champion}**! You earned ${winnings} (Odds: x{odds})")
             else:
@@ -121,13 +125,35 @@ if "standings" in st.session_state and st.session_state.standings:
         if "final_bracket" in st.session_state and st.session_state.final_bracket:
             st.subheader("🏆 Playoff Bracket")
             with st.spinner("Drawing playoff bracket..."):
-                fig = draw_nba_bracket(
+                image = render_bracket(
                     st.session_state.final_bracket["east"],
                     st.session_state.final_bracket["west"],
                     st.session_state.final_bracket["final"],
                     highlight_team=None
                 )
-                st.pyplot(fig, use_container_width=True)
+                st.image(image, use_container_width=True)
+
+# Season projections, refined chunk by chunk until the estimates settle
+PROJECTION_SEED = 0
+PROJECTION_PRECISION = 0.005
+
+st.subheader("📈 Season Projections")
+if st.button("Project Season Odds"):
+    cache = ResultCache()
+    key = cache_key("projection", league_config(), None, PROJECTION_SEED, precision=PROJECTION_PRECISION)
+    status = st.empty()
+    table = st.empty()
+    snapshot = cache.get(key)
+    if snapshot is None:
+        with st.spinner("Simulating seasons..."):
+            for snapshot in stream_season_odds(precision=PROJECTION_PRECISION, time_budget=10, seed=PROJECTION_SEED):
+                status.caption(f"{snapshot['seasons']:,} seasons simulated (±{100 * snapshot['max_half_width']:.2f}%)")
+                table.dataframe(projection_table(snapshot), hide_index=True)
+        # A run cut short by the time budget depends on machine speed, so only converged runs are shared.
+        if snapshot["converged"]:
+            cache.put(key, snapshot)
+    status.caption(f"{snapshot['seasons']:,} seasons simulated (±{100 * snapshot['max_half_width']:.2f}%)")
+    table.dataframe(projection_table(snapshot), hide_index=True)
 
 # Team Info Section
 st.subheader("**Team Info**")
@@ -234,6 +260,3 @@ with team_col2:
     st.markdown("""
     The Omaha Crows are one of the greatest franchises in NHA history, mainly due to Rick Harrison’s status as the greatest coach to ever do it, but after his retirement in 2021, the team would start to fall apart, with the final piece being J’akkar Okoro’s move to Salt Lake City last off-season, that would completely kill any chance this team would have at winning games.
     """)
-
-if __name__ == "__main__":
-    run_simulation()
\ No newline at end of file
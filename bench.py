@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+import simulator
+
+SEED = 2024
+BASELINE_PATH = "bench_baseline.json"
+# Brackets for --check as (east size, west size); 6 gives the top two seeds byes.
+CHECK_BRACKETS = {"8 per side": (8, 8), "6 per side (byes)": (6, 6), "4 vs 8": (4, 8)}
+CHECK_SEASONS = {"batch": 200000, "scalar": 20000}
+CHECK_SIGMAS = 5.0
+
+# ===== BENCHMARKS =====
+
+def build_benchmarks(quick=False):
+    scale = 0.1 if quick else 1.0
+    eastern_teams, western_teams = simulator.generate_teams()
+    all_teams = eastern_teams + western_teams
+    games_per_season = len(all_teams) * (len(all_teams) - 1)
+
+    # The per-game helpers are timed as entry points call them, with the league resolved once.
+    league = simulator.compile_league(tuple(eastern_teams), tuple(western_teams))
+
+    random.seed(SEED)
+    results = simulator.simulate_regular_season(all_teams, league)
+    standings, bracket_data, champion = simulator.simulate_season(eastern_teams, western_teams)
+    east = [match[0] for match in bracket_data["east"][0]] + [match[1] for match in reversed(bracket_data["east"][0])]
+    west = [match[0] for match in bracket_data["west"][0]] + [match[1] for match in reversed(bracket_data["west"][0])]
+    n_seasons = max(1000, int(20000 * scale))
+
+    def draw_bracket():
+        simulator.draw_nba_bracket(bracket_data["east"], bracket_data["west"], bracket_data["final"], champion)
+
+    # name: (callable, work units per call, unit label, calls per sample, samples)
+    return {
+        "simulate_game": (lambda: simulator.simulate_game("New York Skies", "Omaha Crows", league), 1, "games", 1000, 50),
+        "simulate_series": (lambda: simulator.simulate_series("New York Skies", "Miami Savages", league=league), 1, "series", 200, 50),
+        "simulate_regular_season": (lambda: simulator.simulate_regular_season(all_teams, league), games_per_season, "games", 5, 30),
+        "get_standings": (lambda: simulator.get_standings(results), 1, "standings", 200, 30),
+        "simulate_playoffs": (lambda: simulator.simulate_playoffs(east, west), 1, "playoffs", 20, 30),
+        "simulate_season": (lambda: simulator.simulate_season(eastern_teams, western_teams), 1, "seasons", 5, 30),
+        "calculate_odds": (lambda: simulator.calculate_odds("Miami Savages", 5), 1, "prices", 1000, 50),
+        "draw_nba_bracket": (draw_bracket, 1, "brackets", 1, max(3, int(10 * scale))),
+        "n_seasons_batch": (lambda: simulator.simulate_season_batch(n_seasons, rng=SEED), n_seasons, "seasons", 1, max(3, int(10 * scale))),
+    }
+
+# ===== MEASUREMENT =====
+
+def measure(fn, work, number, repeat):
+    random.seed(SEED)
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    samples = np.array(samples)
+
+    random.seed(SEED)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mean_s": float(samples.mean()),
+        "p50_s": float(np.percentile(samples, 50)),
+        "p95_s": float(np.percentile(samples, 95)),
+        "p99_s": float(np.percentile(samples, 99)),
+        "throughput": float(work / np.percentile(samples, 50)),
+        "peak_kib": peak / 1024,
+    }
+
+def run_benchmarks(quick=False, only=None):
+    results = {}
+    for name, (fn, work, unit, number, repeat) in build_benchmarks(quick).items():
+        if only and name not in only:
+            continue
+        results[name] = {**measure(fn, work, max(1, int(number * (0.2 if quick else 1))), repeat), "unit": unit}
+        print(f"{name:26s} p50 {results[name]['p50_s'] * 1e3:10.4f} ms  "
+              f"{results[name]['throughput']:14,.0f} {unit}/s  peak {results[name]['peak_kib']:10.1f} KiB")
+    return results
+
+# ===== ORACLE CHECKS =====
+
+def check_title_odds(brackets=CHECK_BRACKETS, seasons=CHECK_SEASONS, sigmas=CHECK_SIGMAS):
+    # bracket_probabilities is exact, so seeded batch and scalar playoff runs must
+    # land within sampling error of it. Returns the failing (bracket, method) pairs.
+    eastern_teams, western_teams = simulator.generate_teams()
+    failures = []
+    for name, (east_size, west_size) in brackets.items():
+        east, west = eastern_teams[:east_size], western_teams[:west_size]
+        teams = east + west
+        exact = np.array([reach[-1] for reach in simulator.bracket_probabilities(east, west).values()])
+        batch = simulator.simulate_playoffs_batch(east, west, seasons["batch"], rng=SEED)["champions"]
+        random.seed(SEED)
+        scalar = Counter(simulator.simulate_playoffs(east, west)[1] for _ in range(seasons["scalar"]))
+        estimates = {
+            "batch": np.bincount(batch, minlength=len(teams)) / seasons["batch"],
+            "scalar": np.array([scalar[team] for team in teams]) / seasons["scalar"],
+        }
+        for method, estimate in estimates.items():
+            n = seasons[method]
+            # The 1 / n floor keeps a single sighting of a near-zero long shot from failing.
+            z = np.abs(estimate - exact) / (np.sqrt(exact * (1 - exact) / n) + 1 / n)
+            ok = z.max() <= sigmas and abs(exact.sum() - 1) < 1e-9
+            print(f"{name:20s} {method:7s} max |z| {z.max():5.2f}  {'ok' if ok else 'FAIL'}")
+            if not ok:
+                failures.append((name, method))
+    return failures
+
+# ===== BASELINES =====
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_s", "peak_kib"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every simulator stage against a stored baseline.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging, as a fraction")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions, for smoke runs")
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--update", action="store_true", help="overwrite the baseline even if regressions are found")
+    parser.add_argument("--no-save", action="store_true", help="never write the baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="only check batch and scalar title odds against the exact bracket odds")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check_title_odds() else 0
+
+    results = run_benchmarks(args.quick, args.only)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, previous, current in regressions:
+        print(f"REGRESSION {name} {metric}: {previous:.6g} -> {current:.6g} ({current / previous - 1:+.1%})")
+    if baseline and not regressions:
+        print(f"No regressions against {args.baseline}")
+
+    if not args.no_save and (args.update or not regressions):
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "seed": SEED,
+                "quick": args.quick,
+                "results": {**baseline.get("results", {}), **results},
+            }, f, indent=2)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
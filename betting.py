@@ -0,0 +1,211 @@
+import numpy as np
+
+MARKETS = ("champion", "conference", "series", "over", "under")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# Bets times seasons settled per block, to bound the temporary arrays.
+SETTLE_BLOCK = 1 << 20
+# Bettor-seasons of P&L held at once by risk_report.
+PNL_BLOCK = 1 << 22
+
+# ===== BETS =====
+
+def compile_bets(bets, teams):
+    # Each bet is a dict with bettor, market, team, stake and decimal odds (a win
+    # pays stake * odds back), plus an opponent for series bets and a wins line
+    # for over/under bets. The result is one array per field, in input order.
+    index = {team: i for i, team in enumerate(teams)}
+    bettors = {}
+    columns = {field: [] for field in ("bettor", "market", "team", "opponent", "line", "stake", "odds")}
+
+    def team_id(team):
+        if team not in index:
+            raise ValueError(f"{team} is not in this league")
+        return index[team]
+
+    for bet in bets:
+        market = bet["market"]
+        if market not in MARKETS:
+            raise ValueError(f"unknown market {market!r}; expected one of {', '.join(MARKETS)}")
+        if market == "series" and bet.get("opponent") is None:
+            raise ValueError("series bets need an opponent")
+        if market == "series" and bet["opponent"] == bet["team"]:
+            raise ValueError(f"{bet['team']} cannot play a series against itself")
+        if market in ("over", "under") and bet.get("line") is None:
+            raise ValueError(f"{market} bets need a wins line")
+        if bet["stake"] < 0 or bet["odds"] < 1:
+            raise ValueError("stakes must be non-negative and decimal odds at least 1")
+        columns["bettor"].append(bettors.setdefault(bet["bettor"], len(bettors)))
+        columns["market"].append(MARKETS.index(market))
+        columns["team"].append(team_id(bet["team"]))
+        columns["opponent"].append(team_id(bet["opponent"]) if market == "series" else -1)
+        columns["line"].append(float(bet["line"]) if market in ("over", "under") else np.nan)
+        columns["stake"].append(float(bet["stake"]))
+        columns["odds"].append(float(bet["odds"]))
+
+    compiled = {field: np.array(values, dtype=np.float64 if field in ("line", "stake", "odds") else np.int64)
+                for field, values in columns.items()}
+    compiled["teams"] = list(teams)
+    compiled["bettors"] = list(bettors)
+    return compiled
+
+# ===== OUTCOMES =====
+
+def season_outcome(teams, bracket_data, standings=None):
+    # One realized season from simulate_season / simulate_playoffs, shaped like a
+    # batch of one. Without standings, over/under bets are void.
+    index = {team: i for i, team in enumerate(teams)}
+    matches = [match for rnd in bracket_data["east"] + bracket_data["west"] for match in rnd] + [bracket_data["final"]]
+    east_champ, west_champ, champion = bracket_data["final"]
+    wins = np.full(len(teams), -1, dtype=np.int64)
+    for row in standings or []:
+        wins[index[row["name"]]] = row["W"]
+    return {
+        "teams": list(teams),
+        "champions": np.array([index[champion]]),
+        "conference_champions": np.array([[index[east_champ], index[west_champ]]]),
+        "series_winners": np.array([[index[winner] for _, _, winner in matches]]),
+        "series_losers": np.array([[index[team1] + index[team2] - index[winner] for team1, team2, winner in matches]]),
+        "wins": wins[None, :],
+    }
+
+def conference_champions(outcomes):
+    if "conference_champions" in outcomes:
+        return outcomes["conference_champions"]
+    # Each conference plays size - 1 series, and series_winners lists them conference by conference.
+    columns, end = [], 0
+    for name in outcomes["conferences"]:
+        seeded = outcomes["conference_seeds"][name]
+        end += seeded.shape[1] - 1
+        columns.append(outcomes["series_winners"][:, end - 1] if seeded.shape[1] > 1 else seeded[:, 0])
+    return np.stack(columns, axis=1)
+
+# ===== SETTLEMENT =====
+
+def _returns(bets, outcomes, conference_winners, rows):
+    # Multiple of the stake paid back, one row per bet and one column per season:
+    # the odds on a win, 1 on a push or void, 0 on a loss. Bet-major rows keep the
+    # per-market fills and per-bettor sums on contiguous memory.
+    num_rows, num_teams = rows.stop - rows.start, len(bets["teams"])
+    season = np.arange(num_rows)[:, None]
+    returns = np.zeros((len(bets["stake"]), num_rows))
+    for code, market in enumerate(MARKETS):
+        idx = np.flatnonzero(bets["market"] == code)
+        if len(idx) == 0:
+            continue
+        team, odds = bets["team"][idx], bets["odds"][idx, None]
+        if market == "champion":
+            returns[idx] = np.where(outcomes["champions"][rows] == team[:, None], odds, 0.0)
+        elif market == "conference":
+            is_winner = np.zeros((num_rows, num_teams), dtype=bool)
+            is_winner[season, conference_winners[rows]] = True
+            returns[idx] = np.where(is_winner.T[team], odds, 0.0)
+        elif market == "series":
+            # Each series as one winner-loser code. Looking those up among the codes
+            # the bets can settle on gives which of them happened in which season,
+            # in rows x series memory plus a codes x rows table; a bet is settled
+            # only if the two teams meet, otherwise it is void.
+            played = outcomes["series_winners"][rows] * num_teams + outcomes["series_losers"][rows]
+            opponent = bets["opponent"][idx]
+            won_code, lost_code = team * num_teams + opponent, opponent * num_teams + team
+            codes = np.unique(np.r_[won_code, lost_code])
+            position = np.minimum(np.searchsorted(codes, played), len(codes) - 1)
+            hit = codes[position] == played
+            met = np.zeros((len(codes), num_rows), dtype=bool)
+            met[position[hit], np.nonzero(hit)[0]] = True
+            won, lost = met[np.searchsorted(codes, won_code)], met[np.searchsorted(codes, lost_code)]
+            returns[idx] = np.where(won, odds, np.where(lost, 0.0, 1.0))
+        else:
+            wins, line = np.ascontiguousarray(outcomes["wins"][rows].T)[team], bets["line"][idx, None]
+            won = (wins > line) if market == "over" else (wins < line) & (wins >= 0)
+            returns[idx] = np.where(won, odds, np.where((wins == line) | (wins < 0), 1.0, 0.0))
+    return returns
+
+def _blocks(bets, outcomes):
+    num_seasons = len(outcomes["champions"])
+    block = max(1, SETTLE_BLOCK // max(1, len(bets["stake"])))
+    for start in range(0, num_seasons, block):
+        yield slice(start, min(start + block, num_seasons))
+
+def _conference_winners(bets, outcomes):
+    if bets["teams"] != list(outcomes["teams"]):
+        raise ValueError("bets and outcomes come from different leagues")
+    if (bets["market"] == MARKETS.index("conference")).any():
+        return conference_champions(outcomes)
+    return None
+
+def settle(bets, outcomes):
+    # Payout of every bet (columns) in every season (rows), stake included.
+    conference_winners = _conference_winners(bets, outcomes)
+    payouts = np.zeros((len(outcomes["champions"]), len(bets["stake"])))
+    for rows in _blocks(bets, outcomes):
+        payouts[rows] = (_returns(bets, outcomes, conference_winners, rows) * bets["stake"][:, None]).T
+    return payouts
+
+def risk_report(bets, outcomes, bankrolls=None, percentiles=PERCENTILES):
+    # Bettors are handled in blocks of at most PNL_BLOCK bettor-seasons, and each
+    # block's bets are settled SETTLE_BLOCK bet-seasons at a time, so memory is
+    # bounded by those two constants rather than by bets times seasons.
+    conference_winners = _conference_winners(bets, outcomes)
+    teams, bettors = bets["teams"], bets["bettors"]
+    num_seasons = len(outcomes["champions"])
+    # Bets regrouped by bettor, so each bettor block is a contiguous run of bets.
+    order = np.argsort(bets["bettor"], kind="stable")
+    grouped = {field: values[order] if isinstance(values, np.ndarray) else values for field, values in bets.items()}
+    stake = grouped["stake"]
+    starts = np.flatnonzero(np.r_[True, np.diff(grouped["bettor"]) != 0]) if len(order) else order
+    bounds = np.r_[starts, len(order)]
+    start_balance = np.array([(bankrolls or {}).get(bettor, 0.0) for bettor in bettors])
+
+    total_payout = np.zeros(len(stake))
+    house = np.full(num_seasons, stake.sum())
+    bettor_ev = np.zeros(len(bettors))
+    bettor_percentiles = np.zeros((len(percentiles), len(bettors)))
+    per_block = max(1, PNL_BLOCK // max(num_seasons, 1))
+    for first in range(0, len(starts), per_block):
+        last = min(first + per_block, len(starts))
+        block_bets = slice(bounds[first], bounds[last])
+        block = {field: values[block_bets] if isinstance(values, np.ndarray) else values
+                 for field, values in grouped.items()}
+        block_starts = starts[first:last] - bounds[first]
+        balances = np.zeros((last - first, num_seasons))
+        for rows in _blocks(block, outcomes):
+            payouts = _returns(block, outcomes, conference_winners, rows)
+            payouts *= block["stake"][:, None]
+            total_payout[block_bets] += payouts.sum(axis=1)
+            house[rows] -= payouts.sum(axis=0)
+            if len(block_starts) == len(block["stake"]):
+                balances[:, rows] = payouts
+            else:
+                balances[:, rows] = np.add.reduceat(payouts, block_starts, axis=0)
+        balances -= np.add.reduceat(block["stake"], block_starts)[:, None]
+        if num_seasons:
+            bettor_ev[first:last] = balances.mean(axis=1)
+            balances += start_balance[grouped["bettor"][bounds[first:last]]][:, None]
+            bettor_percentiles[:, grouped["bettor"][bounds[first:last]]] = np.percentile(
+                balances, percentiles, axis=1, overwrite_input=True)
+    expected_payout = np.zeros(len(stake))
+    expected_payout[order] = total_payout / max(num_seasons, 1)
+    ev_by_bettor = np.zeros(len(bettors))
+    if len(order):
+        ev_by_bettor[grouped["bettor"][starts]] = bettor_ev
+
+    champions = outcomes["champions"]
+    titles = np.bincount(champions, minlength=len(teams))
+    house_by_champion = np.bincount(champions, weights=house, minlength=len(teams))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # The house's mean net loss in the seasons each team wins the title.
+        exposure = np.where(titles > 0, -house_by_champion / titles, np.nan)
+    house_percentiles = np.percentile(house, percentiles) if num_seasons else np.zeros(len(percentiles))
+    return {
+        "seasons": num_seasons,
+        "handle": float(stake.sum()),
+        "expected_payout": expected_payout,
+        "bet_ev": expected_payout - bets["stake"],
+        "house_ev": float(house.mean()) if num_seasons else 0.0,
+        "house_loss_probability": float((house < 0).mean()) if num_seasons else 0.0,
+        "house_percentiles": dict(zip(percentiles, house_percentiles.tolist())),
+        "exposure": dict(zip(teams, exposure.tolist())),
+        "bettor_ev": dict(zip(bettors, ev_by_bettor.tolist())),
+        "bettor_percentiles": {bettor: dict(zip(percentiles, bettor_percentiles[:, b].tolist()))
+                               for b, bettor in enumerate(bettors)},
+    }
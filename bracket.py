@@ -0,0 +1,176 @@
+import io
+import threading
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+import instrumentation
+
+BOX_W, BOX_H = 3, 1
+GAP_Y = 1.5
+ROUND_GAP_X = 4
+FINALS_X = 15
+CACHE_SIZE = 64
+
+def normalize(name):
+    return name.strip().lower().replace(" ", "") if name else ""
+
+# ===== LAYOUT =====
+
+def _conference_layout(side, shape, x_start, direction, layout):
+    boxes = {}
+    for rnd, num_matches in enumerate(shape):
+        match_spacing = GAP_Y * (2 ** rnd)
+        for i in range(num_matches):
+            y1 = i * match_spacing * 2
+            y2 = y1 + match_spacing
+            x = x_start + direction * rnd * ROUND_GAP_X
+            layout["boxes"].extend([(x, y1), (x, y2)])
+            layout["slots"].append(((side, rnd, i, 0), x + 0.15, y1 + BOX_H / 2, {"va": "center", "ha": "left", "fontsize": 7}))
+            layout["slots"].append(((side, rnd, i, 1), x + 0.15, y2 + BOX_H / 2, {"va": "center", "ha": "left", "fontsize": 7}))
+            boxes[(rnd, i)] = (x, y1, y2)
+
+            x0 = x + BOX_W if direction == 1 else x
+            x1 = x0 + direction * 0.5
+            layout["lines"].append(((x0, x1), (y1 + BOX_H / 2, y1 + BOX_H / 2)))
+            layout["lines"].append(((x0, x1), (y2 + BOX_H / 2, y2 + BOX_H / 2)))
+            layout["lines"].append(((x1, x1), (y1 + BOX_H / 2, y2 + BOX_H / 2)))
+    _, y1, y2 = boxes[(len(shape) - 1, 0)]
+    return (y1 + y2) / 2
+
+def bracket_layout(east_shape, west_shape):
+    # Geometry depends only on how many matches each round has, never on the teams.
+    layout = {"boxes": [], "lines": [], "slots": []}
+    layout["slots"].append((("title", "east"), 1, 18, {"fontsize": 13, "weight": "bold"}))
+    y_east = _conference_layout("east", east_shape, 2, 1, layout)
+    layout["slots"].append((("title", "west"), 29, 18, {"fontsize": 13, "weight": "bold", "ha": "right"}))
+    y_west = _conference_layout("west", west_shape, 28 - BOX_W, -1, layout)
+
+    finals_y = (y_east + y_west) / 2
+    layout["slots"].append((("finals", "title"), FINALS_X, finals_y + 6, {"fontsize": 14, "weight": "bold", "ha": "center"}))
+    layout["slots"].append((("finals", "matchup"), FINALS_X, finals_y + 5, {"fontsize": 10, "ha": "center"}))
+    layout["slots"].append((("finals", "winner"), FINALS_X, finals_y + 4.25, {"fontsize": 10, "weight": "bold", "ha": "center"}))
+    return layout
+
+def bracket_labels(east_bracket, west_bracket, finals, highlight_team=None):
+    norm_highlight = normalize(highlight_team)
+
+    def color(*teams):
+        return "red" if norm_highlight in [normalize(team) for team in teams] else "black"
+
+    labels = {
+        ("title", "east"): ("Eastern Conference", "black"),
+        ("title", "west"): ("Western Conference", "black"),
+        ("finals", "title"): ("Finals", "black"),
+    }
+    for side, bracket in (("east", east_bracket), ("west", west_bracket)):
+        for rnd, matches in enumerate(bracket):
+            for i, (team1, team2, winner) in enumerate(matches):
+                labels[(side, rnd, i, 0)] = (team1, color(team1))
+                labels[(side, rnd, i, 1)] = (team2, color(team2))
+
+    team1, team2, champ = finals
+    labels[("finals", "matchup")] = (f"{team1} vs {team2}", color(team1, team2))
+    labels[("finals", "winner")] = (f"Winner: {champ}", color(champ))
+    return labels
+
+def _shape(bracket):
+    return tuple(len(matches) for matches in bracket)
+
+# ===== MATPLOTLIB RENDERING =====
+
+def _build_figure(layout):
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Rectangle
+
+    # A bare Figure is not registered with pyplot, so nothing piles up between renders.
+    fig = Figure(figsize=(18, 10))
+    ax = fig.subplots()
+    ax.axis('off')
+    for x, y in layout["boxes"]:
+        ax.add_patch(Rectangle((x, y), BOX_W, BOX_H, fill=False))
+    for xs, ys in layout["lines"]:
+        ax.plot(xs, ys, color='black')
+    texts = {key: ax.text(x, y, "", **style) for key, x, y, style in layout["slots"]}
+    fig.tight_layout()
+    return fig, texts
+
+def draw_bracket_figure(east_bracket, west_bracket, finals, highlight_team=None):
+    fig, texts = _build_figure(bracket_layout(_shape(east_bracket), _shape(west_bracket)))
+    for key, (text, color) in bracket_labels(east_bracket, west_bracket, finals, highlight_team).items():
+        texts[key].set_text(text)
+        texts[key].set_color(color)
+    return fig
+
+_templates = {}
+_render_cache = OrderedDict()
+_lock = threading.Lock()
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+@instrumentation.timed("render_bracket")
+def render_bracket(east_bracket, west_bracket, finals, highlight_team=None, fmt="png"):
+    key = (fmt, _freeze(east_bracket), _freeze(west_bracket), _freeze(finals), normalize(highlight_team))
+    with _lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            return _render_cache[key]
+
+        if fmt == "svg-lite":
+            image = render_bracket_svg(east_bracket, west_bracket, finals, highlight_team).encode()
+        else:
+            shape = (_shape(east_bracket), _shape(west_bracket))
+            if shape not in _templates:
+                _templates[shape] = _build_figure(bracket_layout(*shape))
+            fig, texts = _templates[shape]
+            for slot, (text, color) in bracket_labels(east_bracket, west_bracket, finals, highlight_team).items():
+                texts[slot].set_text(text)
+                texts[slot].set_color(color)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, bbox_inches="tight")
+            image = buffer.getvalue()
+
+        _render_cache[key] = image
+        if len(_render_cache) > CACHE_SIZE:
+            _render_cache.popitem(last=False)
+        return image
+
+# ===== SVG RENDERING =====
+
+SVG_SCALE = 40
+SVG_BOUNDS = (0, -1, 30, 20)
+
+def render_bracket_svg(east_bracket, west_bracket, finals, highlight_team=None):
+    layout = bracket_layout(_shape(east_bracket), _shape(west_bracket))
+    labels = bracket_labels(east_bracket, west_bracket, finals, highlight_team)
+    min_x, min_y, max_x, max_y = SVG_BOUNDS
+
+    def px(x):
+        return round((x - min_x) * SVG_SCALE, 2)
+
+    def py(y):
+        return round((max_y - y) * SVG_SCALE, 2)
+
+    anchors = {"left": "start", "center": "middle", "right": "end"}
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{px(max_x)}" height="{py(min_y)}" '
+        f'font-family="DejaVu Sans, sans-serif">',
+        '<rect width="100%" height="100%" fill="white"/>',
+    ]
+    for x, y in layout["boxes"]:
+        parts.append(f'<rect x="{px(x)}" y="{py(y + BOX_H)}" width="{BOX_W * SVG_SCALE}" height="{BOX_H * SVG_SCALE}" '
+                     f'fill="none" stroke="black"/>')
+    for (x0, x1), (y0, y1) in layout["lines"]:
+        parts.append(f'<line x1="{px(x0)}" y1="{py(y0)}" x2="{px(x1)}" y2="{py(y1)}" stroke="black" stroke-width="1.5"/>')
+    for key, x, y, style in layout["slots"]:
+        text, color = labels[key]
+        weight = ' font-weight="bold"' if style.get("weight") == "bold" else ""
+        baseline = ' dominant-baseline="middle"' if style.get("va") == "center" else ""
+        # Scaled so team names fill their boxes about as much as in the figure.
+        size = round(style["fontsize"] * SVG_SCALE / 28, 1)
+        parts.append(f'<text x="{px(x)}" y="{py(y)}" font-size="{size}" fill="{color}" '
+                     f'text-anchor="{anchors[style.get("ha", "left")]}"{baseline}{weight}>{escape(text)}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts)
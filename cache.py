@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import simulator
+
+CACHE_DIR = os.environ.get("NHA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nha-simulator"))
+MAX_BYTES = 256 * 1024 * 1024
+# Temp files older than this were left by a writer that died before its replace.
+STALE_TMP_SECONDS = 3600
+
+def cache_key(kind, config, n_seasons, seed, **params):
+    payload = {
+        "kind": kind,
+        "engine": simulator.ENGINE_VERSION,
+        "config": config,
+        "n_seasons": n_seasons,
+        "seed": seed,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    # Entries are written to a temp file and os.replace()d into place, so readers
+    # in any process see either nothing or a complete entry. Recency is the file
+    # mtime, refreshed on every hit; eviction runs under an exclusive flock.
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Evicted since we read it; the value is still good.
+            pass
+        return value
+
+    def put(self, key, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        # Temp files count toward the budget; a live writer's are left alone, and
+        # stale ones from crashed writers are removed whatever the total.
+        with self._lock():
+            entries, total = [], 0
+            stale_before = time.time() - STALE_TMP_SECONDS
+            for name in os.listdir(self.directory):
+                if not name.endswith((".pkl", ".tmp")):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".tmp") and stat.st_mtime < stale_before:
+                        os.unlink(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                if name.endswith(".pkl"):
+                    entries.append((stat.st_mtime, stat.st_size, name))
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        with self._lock():
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.unlink(os.path.join(self.directory, name))
+
+def cached_season_tallies(n_seasons, seed, workers=None, cache=None, eastern_teams=None, western_teams=None):
+    if seed is None:
+        # Unseeded runs are not reproducible, so there is nothing to share.
+        return simulator.simulate_seasons_parallel(n_seasons, workers=workers, eastern_teams=eastern_teams,
+                                                   western_teams=western_teams)
+    cache = cache or ResultCache()
+    key = cache_key("season_tallies", simulator.league_config(eastern_teams, western_teams), n_seasons, seed)
+    return cache.get_or_compute(key, lambda: simulator.simulate_seasons_parallel(
+        n_seasons, seed=seed, workers=workers, eastern_teams=eastern_teams, western_teams=western_teams,
+    ))
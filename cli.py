@@ -0,0 +1,77 @@
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
+import simulator
+
+def aggregate(totals):
+    seasons = totals["seasons"]
+    league = simulator.compile_league(*map(tuple, simulator.generate_teams()))
+    wins = np.arange(totals["win_counts"].shape[1])
+    rows = []
+    for i, team in enumerate(totals["teams"]):
+        seed_counts = totals["seed_counts"][i]
+        rows.append({
+            "team": team,
+            "tier": league.tier_of(team),
+            "title_pct": 100 * totals["champion_counts"][i] / seasons,
+            "playoffs_pct": 100 * (1 - seed_counts[0] / seasons),
+            "avg_wins": float(totals["win_counts"][i] @ wins) / seasons,
+            "seed_pct": [100 * count / seasons for count in seed_counts[1:]],
+        })
+    return sorted(rows, key=lambda row: -row["title_pct"])
+
+def write_table(rows, out):
+    out.write(f"{'Team':24s} {'Tier':>4s} {'Title %':>8s} {'Playoffs %':>11s} {'Avg W':>6s}\n")
+    for row in rows:
+        out.write(f"{row['team']:24s} {row['tier']:>4s} {row['title_pct']:8.2f} {row['playoffs_pct']:11.1f} "
+                  f"{row['avg_wins']:6.2f}\n")
+
+def write_csv(rows, out):
+    num_seeds = len(rows[0]["seed_pct"]) if rows else 0
+    writer = csv.writer(out)
+    writer.writerow(["team", "tier", "title_pct", "playoffs_pct", "avg_wins"]
+                    + [f"seed_{seed}_pct" for seed in range(1, num_seeds + 1)])
+    for row in rows:
+        writer.writerow([row["team"], row["tier"], f"{row['title_pct']:.4f}", f"{row['playoffs_pct']:.4f}",
+                         f"{row['avg_wins']:.4f}"] + [f"{pct:.4f}" for pct in row["seed_pct"]])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate NHA seasons and report per-team aggregates.")
+    parser.add_argument("-n", "--seasons", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="process-pool size; results do not depend on it")
+    parser.add_argument("--cache", action="store_true", help="reuse or store seeded runs in the result cache")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if args.seasons < 1:
+        parser.error("--seasons must be at least 1")
+
+    if args.cache:
+        from cache import cached_season_tallies
+
+        totals = cached_season_tallies(args.seasons, args.seed, workers=args.workers)
+    else:
+        totals = simulator.simulate_seasons_parallel(args.seasons, seed=args.seed, workers=args.workers)
+    rows = aggregate(totals)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump({"seasons": totals["seasons"], "seed": totals["seed"], "teams": rows}, out, indent=2)
+            out.write("\n")
+        elif args.format == "csv":
+            write_csv(rows, out)
+        else:
+            write_table(rows, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
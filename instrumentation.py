@@ -0,0 +1,120 @@
+import functools
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# The active Instrumentation, or None. Each thread (and asyncio task) sees its own
+# value, so concurrent sessions never count into each other's run. Hot paths check
+# current.get() before doing any work, so a disabled run costs one lookup per call.
+current = ContextVar("instrumentation", default=None)
+
+class Instrumentation:
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def count(self, **counters):
+        for name, value in counters.items():
+            self.counters[name] += value
+
+    def record(self, stage, elapsed):
+        self.calls[stage] += 1
+        self.seconds[stage] += elapsed
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "stages": {
+                stage: {"calls": self.calls[stage], "total_s": self.seconds[stage],
+                        "mean_s": self.seconds[stage] / self.calls[stage]}
+                for stage in self.calls
+            },
+        }
+
+def count(**counters):
+    instrumentation = current.get()
+    if instrumentation is not None:
+        instrumentation.count(**counters)
+
+def timed(stage):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            instrumentation = current.get()
+            if instrumentation is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                instrumentation.record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@contextmanager
+def instrumented(*sinks):
+    instrumentation = Instrumentation()
+    token = current.set(instrumentation)
+    for sink in sinks:
+        sink.start()
+    try:
+        yield instrumentation
+    finally:
+        current.reset(token)
+        for sink in sinks:
+            sink.emit(instrumentation.snapshot())
+
+# ===== SINKS =====
+
+class MemorySink:
+    def __init__(self):
+        self.snapshots = []
+
+    def start(self):
+        pass
+
+    def emit(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    @property
+    def last(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+
+    def start(self):
+        pass
+
+    def emit(self, snapshot):
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"time": time.time(), **snapshot}) + "\n")
+
+class ProfileSink:
+    def __init__(self, path=None, sort="cumulative", limit=25):
+        self.path = path
+        self.sort = sort
+        self.limit = limit
+        self.profile = None
+        self.stats = None
+
+    def start(self):
+        import cProfile
+
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def emit(self, snapshot):
+        import pstats
+
+        self.profile.disable()
+        self.stats = pstats.Stats(self.profile).sort_stats(self.sort)
+        if self.path:
+            self.stats.dump_stats(self.path)
+
+    def print_stats(self):
+        self.stats.print_stats(self.limit)
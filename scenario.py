@@ -0,0 +1,149 @@
+import numpy as np
+
+import simulator
+
+class SeasonState:
+    # Results locked in so far: regular-season games as (winner, loser) and decided
+    # playoff series as (winner, loser) or (winner, loser, final). Everything not
+    # recorded here is simulated, so a what-if branch only pays for the games that
+    # are still open.
+
+    def __init__(self, config=None, games=(), series=()):
+        self.config = config or simulator.LeagueConfig.default()
+        league = self.config.league
+        num_teams = len(league.teams)
+        pair_i, pair_j, meetings = simulator.round_robin_schedule(league, self.config.intra_meetings,
+                                                                  self.config.inter_meetings)
+        self.scheduled = np.zeros((num_teams, num_teams), dtype=np.int16)
+        self.scheduled[pair_i, pair_j] = meetings
+        self.scheduled[pair_j, pair_i] = meetings
+        self.played = np.zeros_like(self.scheduled)
+        self.wins = np.zeros(num_teams, dtype=np.int64)
+        self.losses = np.zeros(num_teams, dtype=np.int64)
+        self.games = []
+        self.series = {}
+        for winner, loser in games:
+            self.record_game(winner, loser)
+        for pin in series:
+            self.record_series(*pin)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(simulator.LeagueConfig.from_dict(data["config"]), data["games"], data["series"])
+
+    def to_dict(self):
+        return {
+            "config": self.config.to_dict(),
+            "games": [list(game) for game in self.games],
+            "series": [[winner, loser, self._cross_conference(winner, loser)] for winner, loser in self.series.values()],
+        }
+
+    def branch(self, games=(), series=()):
+        state = SeasonState.__new__(SeasonState)
+        state.config = self.config
+        state.scheduled = self.scheduled
+        state.played = self.played.copy()
+        state.wins = self.wins.copy()
+        state.losses = self.losses.copy()
+        state.games = list(self.games)
+        state.series = dict(self.series)
+        for winner, loser in games:
+            state.record_game(winner, loser)
+        for pin in series:
+            state.record_series(*pin)
+        return state
+
+    # ===== RECORDING =====
+
+    def _team_id(self, team):
+        team_id = self.config.league.index.get(team)
+        if team_id is None:
+            raise ValueError(f"{team} is not in this league")
+        return team_id
+
+    def record_game(self, winner, loser):
+        i, j = self._team_id(winner), self._team_id(loser)
+        if self.played[i, j] >= self.scheduled[i, j]:
+            raise ValueError(f"{winner} and {loser} have no unplayed games left")
+        self.played[i, j] += 1
+        self.played[j, i] += 1
+        self.wins[i] += 1
+        self.losses[j] += 1
+        self.games.append((winner, loser))
+        return self
+
+    def _cross_conference(self, team1, team2):
+        conference = self.config.league.conference
+        return bool(conference[self._team_id(team1)] != conference[self._team_id(team2)])
+
+    def record_series(self, winner, loser, final=False):
+        # Two teams meet at most once per playoffs, so a pin applies to whichever
+        # round they meet in. Teams from different conferences can only meet in the
+        # finals, after the conference brackets, so pinning them needs final=True.
+        i, j = self._team_id(winner), self._team_id(loser)
+        if i == j:
+            raise ValueError(f"{winner} cannot play a series against itself")
+        if self._cross_conference(winner, loser) != final:
+            raise ValueError(f"{winner} and {loser} can only meet in the "
+                             + ("conference playoffs, not the finals" if final else "finals; pass final=True"))
+        if self.regular_season_complete:
+            seeded = {int(team_id) for ids in self.seeding().values() for team_id in ids}
+            for team, team_id in ((winner, i), (loser, j)):
+                if team_id not in seeded:
+                    raise ValueError(f"{team} did not make the playoffs")
+        key = (min(i, j), max(i, j))
+        if key in self.series and self.series[key][0] != winner:
+            raise ValueError(f"the {winner} vs {loser} series is already decided for {self.series[key][0]}")
+        self.series[key] = (winner, loser)
+        return self
+
+    # ===== CONDITIONAL SIMULATION =====
+
+    @property
+    def regular_season_complete(self):
+        return not (self.played < self.scheduled).any()
+
+    def standings(self):
+        return simulator.SeasonResults(self.config.league, self.wins, self.losses)
+
+    def seeding(self):
+        # Playoff seeds per conference as team IDs, once no regular-season game is open.
+        if not self.regular_season_complete:
+            raise ValueError("seeding is only fixed once the regular season is complete")
+        league = self.config.league
+        num_teams = len(league.teams)
+        sort_key = (3 * self.wins * num_teams + (num_teams - 1 - league.name_rank))[None, :]
+        return {name: simulator._seed_conference(sort_key, ids, self.config.playoff_size(name))[0]
+                for name, ids in league.conference_ids.items()}
+
+    def _playoff_prob(self):
+        # A decided series is a sure thing for its winner whenever the pair meets.
+        win_prob = self.config.league.win_prob.copy()
+        for winner, loser in self.series.values():
+            i, j = self._team_id(winner), self._team_id(loser)
+            win_prob[i, j], win_prob[j, i] = 1.0, 0.0
+        return win_prob
+
+    def _remaining_schedule(self):
+        pair_i, pair_j = np.nonzero(np.triu(self.scheduled - self.played, 1))
+        meetings = (self.scheduled - self.played)[pair_i, pair_j].astype(np.int64)
+        return simulator._compile_schedule(self.config.league, pair_i.astype(np.int32), pair_j.astype(np.int32), meetings)
+
+    def simulate(self, n_seasons, rng=None):
+        return simulator._simulate_league(self.config, self._remaining_schedule(), self.wins, self.wins + self.losses,
+                                          self._playoff_prob(), n_seasons, rng)
+
+    def title_odds(self, method="auto", n_seasons=simulator.ODDS_SEASONS, seed=simulator.ODDS_SEED):
+        # "exact" runs the bracket DP and needs settled seeding with two conferences;
+        # "auto" uses it whenever it can and falls back to Monte Carlo otherwise.
+        league = self.config.league
+        exact_ok = self.regular_season_complete and len(league.conferences) == 2
+        if method == "exact" and not exact_ok:
+            raise ValueError("exact odds need a complete regular season and two conferences")
+        if method == "exact" or (method == "auto" and exact_ok):
+            east_ids, west_ids = self.seeding().values()
+            champion = simulator._bracket_reach(east_ids, west_ids, self._playoff_prob(), self.config.best_of)[-1]
+            return dict(zip(league.teams, champion.tolist()))
+        result = self.simulate(n_seasons, rng=seed)
+        counts = np.bincount(result["champions"], minlength=len(league.teams))
+        return dict(zip(league.teams, (counts / n_seasons).tolist()))
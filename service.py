@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import simulator
+
+SOCKET_PATH = os.environ.get("NHA_SERVICE_SOCKET", os.path.join(tempfile.gettempdir(), "nha-simulator.sock"))
+# Requests queued beyond this are turned away with a retry hint instead of piling up.
+MAX_PENDING = 256
+# Most queued requests handed to one worker in a single round trip.
+BATCH_SIZE = 16
+RETRY_AFTER = 0.05
+CLIENT_TIMEOUT = 120.0
+
+# ===== OPERATIONS =====
+# Every operation runs in a worker process and returns JSON-native values, so a
+# result looks the same whether it came over the socket or from call_or_run's
+# in-process fallback.
+
+def _jsonable(value):
+    return json.loads(json.dumps(value, default=lambda o: o.tolist()))
+
+def _championship_odds(east, west, method="exact", n_seasons=simulator.ODDS_SEASONS, seed=simulator.ODDS_SEED):
+    return simulator.championship_odds(east, west, method=method, n_seasons=n_seasons, seed=seed)
+
+def _simulate_season(eastern_teams, western_teams, playoff_teams=8, seed=None):
+    if seed is not None:
+        random.seed(seed)
+    standings, bracket_data, champion = simulator.simulate_season(eastern_teams, western_teams, playoff_teams)
+    return _jsonable([list(standings), bracket_data, champion])
+
+def _simulate_playoffs(east, west, seed=None):
+    if seed is not None:
+        random.seed(seed)
+    return _jsonable(list(simulator.simulate_playoffs(east, west)))
+
+def _season_tallies(n_seasons, seed=None, eastern_teams=None, western_teams=None):
+    totals = simulator.simulate_seasons_parallel(n_seasons, seed=seed, workers=1, eastern_teams=eastern_teams,
+                                                 western_teams=western_teams)
+    return _jsonable(totals)
+
+OPERATIONS = {
+    "championship_odds": _championship_odds,
+    "simulate_season": _simulate_season,
+    "simulate_playoffs": _simulate_playoffs,
+    "season_tallies": _season_tallies,
+}
+
+def _deterministic(op, args):
+    # Only requests that always give the same answer may share one computation.
+    return op == "championship_odds" or args.get("seed") is not None
+
+def _init_worker():
+    # Forked workers inherit the parent's random state; reseed so unseeded
+    # seasons differ between workers.
+    random.seed()
+
+def _run_batch(requests):
+    results = []
+    for op, args in requests:
+        try:
+            results.append((True, OPERATIONS[op](**args)))
+        except Exception as exc:
+            results.append((False, f"{type(exc).__name__}: {exc}"))
+    return results
+
+# ===== SERVER =====
+
+class Busy(Exception):
+    pass
+
+class SimulationService:
+    # Requests are queued and handed to the process pool in batches as workers
+    # free up, so under load one IPC round trip carries several requests while a
+    # lone request is dispatched at once. Identical deterministic requests that
+    # are already in flight share a single future.
+
+    def __init__(self, workers=None, max_pending=MAX_PENDING, batch_size=BATCH_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.inflight = {}
+        self.stats = {"requests": 0, "coalesced": 0, "rejected": 0, "batches": 0, "computed": 0}
+        self.queue = self.slots = self.pool = None
+
+    async def submit(self, op, args):
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown operation {op!r}")
+        self.stats["requests"] += 1
+        key = json.dumps([op, args], sort_keys=True) if _deterministic(op, args) else None
+        future = self.inflight.get(key) if key else None
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            try:
+                self.queue.put_nowait((op, args, future))
+            except asyncio.QueueFull:
+                self.stats["rejected"] += 1
+                raise Busy() from None
+            if key:
+                self.inflight[key] = future
+                future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # Shielded, so a client hanging up never cancels a result others wait on.
+        return await asyncio.shield(future)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.stats["batches"] += 1
+            self.stats["computed"] += len(batch)
+            task = loop.run_in_executor(self.pool, _run_batch, [(op, args) for op, args, _ in batch])
+            task.add_done_callback(functools.partial(self._finish, batch))
+
+    def _finish(self, batch, task):
+        self.slots.release()
+        error = task.exception()
+        for i, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(f"worker failed: {error}"))
+                continue
+            ok, value = task.result()[i]
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                if request.get("op") == "stats":
+                    response = {"ok": True, "result": {**self.stats, "pending": self.queue.qsize()}}
+                else:
+                    response = {"ok": True, "result": await self.submit(request["op"], request.get("args", {}))}
+            except Busy:
+                response = {"ok": False, "busy": True, "retry_after": RETRY_AFTER, "error": "service is busy"}
+            except Exception as exc:
+                response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=SOCKET_PATH, host=None, port=None):
+        self.queue = asyncio.Queue(self.max_pending)
+        self.slots = asyncio.Semaphore(self.workers)
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker) as self.pool:
+            dispatcher = asyncio.create_task(self._dispatch())
+            if host is not None:
+                server = await asyncio.start_server(self._handle, host, port)
+            else:
+                _remove_stale_socket(path)
+                server = await asyncio.start_unix_server(self._handle, path)
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                dispatcher.cancel()
+                if host is None and os.path.exists(path):
+                    os.unlink(path)
+
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"a simulation service is already listening on {path}")
+    finally:
+        probe.close()
+
+# ===== CLIENT =====
+
+class ServiceUnavailable(Exception):
+    pass
+
+class ServiceError(Exception):
+    pass
+
+def _address_from_env():
+    # NHA_SERVICE_ADDRESS is host:port for TCP; otherwise the Unix socket is used.
+    address = os.environ.get("NHA_SERVICE_ADDRESS")
+    if address:
+        host, _, port = address.rpartition(":")
+        return host, int(port)
+    return SOCKET_PATH
+
+class SimulationClient:
+    def __init__(self, address=None, timeout=CLIENT_TIMEOUT, retries=20):
+        self.address = address or _address_from_env()
+        self.timeout = timeout
+        self.retries = retries
+
+    def _connect(self):
+        if isinstance(self.address, tuple):
+            return socket.create_connection(self.address, timeout=self.timeout)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, payload):
+        message = json.dumps(payload, default=lambda o: o.tolist()).encode() + b"\n"
+        try:
+            with self._connect() as sock:
+                sock.sendall(message)
+                with sock.makefile("rb") as stream:
+                    line = stream.readline()
+        except OSError as exc:
+            raise ServiceUnavailable(str(exc)) from exc
+        if not line:
+            raise ServiceUnavailable("service closed the connection")
+        return json.loads(line)
+
+    def call(self, op, **args):
+        for _ in range(self.retries + 1):
+            response = self.request({"op": op, "args": args})
+            if response["ok"]:
+                return response["result"]
+            if not response.get("busy"):
+                raise ServiceError(response["error"])
+            time.sleep(response["retry_after"])
+        raise ServiceUnavailable("service stayed busy")
+
+    def stats(self):
+        return self.request({"op": "stats"})["result"]
+
+def call_or_run(op, client=None, **args):
+    # Uses the shared service when one is listening, else runs op in this process.
+    try:
+        return (client or SimulationClient()).call(op, **args)
+    except ServiceUnavailable:
+        return OPERATIONS[op](**args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve simulations to local app sessions from a process pool.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--host", help="listen on TCP instead, e.g. 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    args = parser.parse_args(argv)
+
+    service = SimulationService(args.workers, args.max_pending)
+    try:
+        asyncio.run(service.serve(args.socket, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
-import streamlit as st
 import random
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+import time
+from collections.abc import Mapping, Sequence
+from functools import cached_property, lru_cache
+from math import comb
+import numpy as np
+import instrumentation
 
 # ===== TEAM DATA =====
 tiers = {
@@ -26,89 +29,653 @@ def generate_teams():
     ]
     return eastern_teams, western_teams
 
-def get_tier(team):
+TIER_STRENGTH = {"A": 4, "B": 3, "C": 2, "D": 1}
+
+# Bump whenever a change alters simulated outcomes for the same seed, so
+# persisted results from older engines are never reused.
+ENGINE_VERSION = 1
+
+def league_config(eastern_teams=None, western_teams=None, best_of=9, playoff_teams=8):
+    return LeagueConfig.default(eastern_teams, western_teams, best_of=best_of, playoff_teams=playoff_teams).to_dict()
+
+class League:
+    def __init__(self, conferences, tier_table=None, strength=None, default_tier="C"):
+        tier_table = tiers if tier_table is None else tier_table
+        self.strength = TIER_STRENGTH if strength is None else strength
+        self.conferences = list(conferences)
+        self.teams = [team for teams in conferences.values() for team in teams]
+        self.index = {team: i for i, team in enumerate(self.teams)}
+        tier_of = {team: tier for tier, team_list in tier_table.items() for team in team_list}
+        self.tier = np.array([tier_of.get(team, default_tier) for team in self.teams])
+        self.conference = np.array([name for name, teams in conferences.items() for _ in teams])
+        # Teams are stored conference by conference, so each one is a contiguous ID range.
+        bounds = np.cumsum([0] + [len(teams) for teams in conferences.values()])
+        self.conference_ids = {name: np.arange(bounds[c], bounds[c + 1]) for c, name in enumerate(conferences)}
+        self.conference_code = np.repeat(np.arange(len(conferences)), np.diff(bounds))
+        strength_values = np.array([self.strength[tier] for tier in self.tier], dtype=np.float64)
+        self.win_prob = strength_values[:, None] / (strength_values[:, None] + strength_values[None, :])
+        self.name_rank = np.empty(len(self.teams), dtype=np.int64)
+        self.name_rank[np.argsort(self.teams)] = np.arange(len(self.teams))
+
+    @cached_property
+    def win_prob_rows(self):
+        # Nested lists index faster than NumPy scalars in the per-game loops.
+        return self.win_prob.tolist()
+
+    def tier_of(self, team):
+        i = self.index.get(team)
+        return str(self.tier[i]) if i is not None else _scan_tier(team)
+
+    def game_prob(self, team1, team2):
+        i, j = self.index.get(team1), self.index.get(team2)
+        if i is not None and j is not None:
+            return self.win_prob_rows[i][j]
+        strength1, strength2 = self.strength[self.tier_of(team1)], self.strength[self.tier_of(team2)]
+        return strength1 / (strength1 + strength2)
+
+def _tier_key():
+    # The current tier table and strengths in hashable form, so caches of compiled
+    # leagues and configs miss once either is edited.
+    return tuple((tier, tuple(team_list)) for tier, team_list in tiers.items()), tuple(TIER_STRENGTH.items())
+
+@lru_cache(maxsize=128)
+def _compile_league(eastern_teams, western_teams, tier_key):
+    tier_table, strength = tier_key
+    return League({"East": eastern_teams, "West": western_teams}, dict(tier_table), dict(strength))
+
+def compile_league(eastern_teams, western_teams):
+    return _compile_league(eastern_teams, western_teams, _tier_key())
+
+class LeagueConfig:
+    def __init__(self, conferences, tier_table=None, strength=None, playoff_teams=8, best_of=9,
+                 intra_meetings=2, inter_meetings=2):
+        self.conferences = {name: list(teams) for name, teams in conferences.items()}
+        # Copies, so the league and to_dict() agree even if tiers is edited later.
+        tier_table = tiers if tier_table is None else tier_table
+        self.tier_table = {tier: list(team_list) for tier, team_list in tier_table.items()}
+        self.strength = dict(TIER_STRENGTH if strength is None else strength)
+        # playoff_teams is one size for every conference or a {conference: size} dict;
+        # best_of is one series length or a list with one entry per playoff round.
+        self.playoff_teams = playoff_teams
+        self.best_of = best_of
+        self.intra_meetings = intra_meetings
+        self.inter_meetings = inter_meetings
+        for length in ([best_of] if isinstance(best_of, int) else best_of):
+            if length % 2 == 0:
+                raise ValueError(f"series must have an odd number of games, got best_of={length}")
+        for name, teams in self.conferences.items():
+            if not 1 <= self.playoff_size(name) <= len(teams):
+                raise ValueError(f"{name} cannot send {self.playoff_size(name)} of {len(teams)} teams to the playoffs")
+
+    @classmethod
+    def default(cls, eastern_teams=None, western_teams=None, **options):
+        if eastern_teams is None or western_teams is None:
+            eastern_teams, western_teams = generate_teams()
+        return cls({"East": eastern_teams, "West": western_teams}, **options)
+
+    @classmethod
+    def synthetic(cls, num_teams, num_conferences=2, tier_weights=None, seed=0, **options):
+        rng = np.random.default_rng(seed)
+        tier_names = list(TIER_STRENGTH)
+        weights = tier_weights or [1 / len(tier_names)] * len(tier_names)
+        teams = [f"Team {i:0{len(str(num_teams))}d}" for i in range(num_teams)]
+        assigned = rng.choice(len(tier_names), size=num_teams, p=weights)
+        tier_table = {tier: [team for team, t in zip(teams, assigned) if t == k] for k, tier in enumerate(tier_names)}
+        conferences = {f"Conference {c + 1}": teams[c::num_conferences] for c in range(num_conferences)}
+        return cls(conferences, tier_table=tier_table, **options)
+
+    def playoff_size(self, conference):
+        if isinstance(self.playoff_teams, dict):
+            return self.playoff_teams[conference]
+        return self.playoff_teams
+
+    @cached_property
+    def league(self):
+        return League(self.conferences, self.tier_table, self.strength)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["conferences"], tier_table=data["tiers"], strength=data["strength"],
+                   playoff_teams=data["playoff_teams"], best_of=data["best_of"],
+                   intra_meetings=data["intra_meetings"], inter_meetings=data["inter_meetings"])
+
+    def to_dict(self):
+        return {
+            "conferences": self.conferences,
+            "tiers": self.tier_table,
+            "strength": self.strength,
+            "playoff_teams": self.playoff_teams,
+            "best_of": self.best_of,
+            "intra_meetings": self.intra_meetings,
+            "inter_meetings": self.inter_meetings,
+        }
+
+@lru_cache(maxsize=32)
+def _compile_config(eastern_teams, western_teams, best_of, playoff_teams, tier_key):
+    tier_table, strength = tier_key
+    return LeagueConfig.default(list(eastern_teams), list(western_teams), tier_table=dict(tier_table),
+                                strength=dict(strength), best_of=best_of, playoff_teams=playoff_teams)
+
+def _default_config(eastern_teams, western_teams, best_of, playoff_teams):
+    return _compile_config(eastern_teams, western_teams, best_of, playoff_teams, _tier_key())
+
+def round_robin_schedule(league, intra_meetings=2, inter_meetings=2):
+    # Every pairing once, with how many times the two teams meet.
+    pair_i, pair_j = np.triu_indices(len(league.teams), 1)
+    same_conference = league.conference_code[pair_i] == league.conference_code[pair_j]
+    meetings = np.where(same_conference, intra_meetings, inter_meetings)
+    keep = meetings > 0
+    return pair_i[keep].astype(np.int32), pair_j[keep].astype(np.int32), meetings[keep]
+
+def _scan_tier(team):
     for tier, team_list in tiers.items():
         if team in team_list:
             return tier
     return "C"
 
-# ===== SIMULATION LOGIC =====
+# (tier table, strengths, League) for the default teams. Entry points called
+# without a league resolve it here once per call; the live tables are compared
+# against the copies taken when it was compiled, which is cheaper than building
+# _tier_key(). Per-game helpers take the resolved league instead.
+_default_league_state = None
+
+def _default_league():
+    global _default_league_state
+    state = _default_league_state
+    if state is None or state[0] != tiers or state[1] != TIER_STRENGTH:
+        state = ({tier: list(team_list) for tier, team_list in tiers.items()}, dict(TIER_STRENGTH),
+                 compile_league(*map(tuple, generate_teams())))
+        _default_league_state = state
+    return state[2]
 
-def simulate_game(team1, team2):
-    tier1, tier2 = get_tier(team1), get_tier(team2)
-    strength = {"A": 4, "B": 3, "C": 2, "D": 1}
-    prob1 = strength[tier1] / (strength[tier1] + strength[tier2])
-    return team1 if random.random() < prob1 else team2
-
-def simulate_regular_season(teams):
-    results = {team: {"W": 0, "L": 0, "Points": 0, "conference": "East" if i < 12 else "West"} 
-               for i, team in enumerate(teams)}
-    for _ in range(2):
-        for i in range(len(teams)):
-            for j in range(i + 1, len(teams)):
-                team1, team2 = teams[i], teams[j]
-                winner = simulate_game(team1, team2)
-                loser = team2 if winner == team1 else team1
-                results[winner]["W"] += 1
-                results[winner]["Points"] += 3
-                results[loser]["L"] += 1
-    return results
+def get_tier(team):
+    return _default_league().tier_of(team)
+
+# ===== SIMULATION LOGIC =====
 
+def simulate_game(team1, team2, league=None):
+    if league is None:
+        league = _default_league()
+    recorder = instrumentation.current.get()
+    if recorder is not None:
+        recorder.count(games=1, rng_draws=1)
+    return team1 if random.random() < league.game_prob(team1, team2) else team2
+
+@lru_cache(maxsize=32)
+def _scalar_schedule(league, intra_meetings, inter_meetings):
+    # round_robin_schedule as plain (i, j) lists, one per meeting: the k-th list
+    # holds every pairing that meets more than k times, so a season plays the
+    # whole schedule once before any pairing meets again.
+    pair_i, pair_j, meetings = round_robin_schedule(league, intra_meetings, inter_meetings)
+    return [list(zip(pair_i[meetings > k].tolist(), pair_j[meetings > k].tolist()))
+            for k in range(int(meetings.max(initial=0)))]
+
+@instrumentation.timed("simulate_regular_season")
+def simulate_regular_season(teams, league, intra_meetings=2, inter_meetings=2):
+    # league is a League, or a LeagueConfig that also sets the meetings per pairing.
+    if isinstance(league, LeagueConfig):
+        league, intra_meetings, inter_meetings = league.league, league.intra_meetings, league.inter_meetings
+    if list(teams) != league.teams:
+        raise ValueError("teams must be the league's teams, in league order")
+    rows = league.win_prob_rows
+    wins = [0] * len(teams)
+    losses = [0] * len(teams)
+    for pairings in _scalar_schedule(league, intra_meetings, inter_meetings):
+        for i, j in pairings:
+            if random.random() < rows[i][j]:
+                wins[i] += 1
+                losses[j] += 1
+            else:
+                wins[j] += 1
+                losses[i] += 1
+    instrumentation.count(games=sum(wins), rng_draws=sum(wins))
+    return SeasonResults(league, wins, losses)
+
+class SeasonResults(Mapping):
+    __slots__ = ("league", "wins", "losses")
+
+    def __init__(self, league, wins, losses):
+        self.league = league
+        self.wins = np.asarray(wins, dtype=np.int16)
+        self.losses = np.asarray(losses, dtype=np.int16)
+
+    @property
+    def points(self):
+        return 3 * self.wins
+
+    def ranking(self):
+        # Points descending, then name ascending, folded into one integer key.
+        num_teams = len(self.league.teams)
+        key = self.points.astype(np.int64) * num_teams + (num_teams - 1 - self.league.name_rank)
+        return np.argsort(-key)
+
+    def conference_ranking(self, conference):
+        return [self.league.teams[i] for i in self.ranking() if self.league.conference[i] == conference]
+
+    def __getitem__(self, team):
+        i = self.league.index[team]
+        return {"W": int(self.wins[i]), "L": int(self.losses[i]), "Points": 3 * int(self.wins[i]),
+                "conference": str(self.league.conference[i])}
+
+    def __iter__(self):
+        return iter(self.league.teams)
+
+    def __len__(self):
+        return len(self.league.teams)
+
+class Standings(Sequence):
+    __slots__ = ("results", "order")
+
+    def __init__(self, results, order):
+        self.results = results
+        self.order = order
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        team = self.results.league.teams[self.order[position]]
+        return {"name": team, **self.results[team]}
+
+    def __len__(self):
+        return len(self.order)
+
+@instrumentation.timed("get_standings")
 def get_standings(results):
+    if isinstance(results, SeasonResults):
+        return Standings(results, results.ranking())
     return sorted(
         [{"name": team, **data} for team, data in results.items()],
         key=lambda x: (-x["Points"], x["name"])
     )
 
-def simulate_series(team1, team2, best_of=9):
-    wins = {team1: 0, team2: 0}
-    while wins[team1] < (best_of // 2 + 1) and wins[team2] < (best_of // 2 + 1):
-        winner = simulate_game(team1, team2)
-        wins[winner] += 1
-    return team1 if wins[team1] > wins[team2] else team2
-
-def playoff_round(teams):
+def simulate_series(team1, team2, best_of=9, league=None):
+    if league is None:
+        league = _default_league()
+    prob1 = league.game_prob(team1, team2)
+    needed = best_of // 2 + 1
+    wins1 = wins2 = 0
+    while wins1 < needed and wins2 < needed:
+        if random.random() < prob1:
+            wins1 += 1
+        else:
+            wins2 += 1
+    recorder = instrumentation.current.get()
+    if recorder is not None:
+        recorder.count(series=1, games=wins1 + wins2, rng_draws=wins1 + wins2)
+    return team1 if wins1 > wins2 else team2
+
+def _num_byes(num_teams):
+    # Top seeds skip the first round until the field is a power of two.
+    return (1 << (num_teams - 1).bit_length()) - num_teams
+
+def playoff_round(teams, league=None):
+    if league is None:
+        league = _default_league()
     round_matches = []
-    winners = []
-    for i in range(len(teams) // 2):
-        team1, team2 = teams[i], teams[-(i + 1)]
-        winner = simulate_series(team1, team2)
+    byes = _num_byes(len(teams))
+    winners = list(teams[:byes])
+    playing = teams[byes:]
+    for i in range(len(playing) // 2):
+        team1, team2 = playing[i], playing[-(i + 1)]
+        winner = simulate_series(team1, team2, league=league)
         round_matches.append((team1, team2, winner))
         winners.append(winner)
     return round_matches, winners
 
-def simulate_playoffs(east, west):
+@instrumentation.timed("simulate_playoffs")
+def simulate_playoffs(east, west, league=None):
+    if league is None:
+        league = _default_league()
     all_rounds = []
 
     def simulate_side(side):
         rounds = []
         current = side
         while len(current) > 1:
-            matches, current = playoff_round(current)
+            matches, current = playoff_round(current, league)
             rounds.append(matches)
         return rounds, current[0]
 
     east_rounds, east_champ = simulate_side(east)
     west_rounds, west_champ = simulate_side(west)
-    final_winner = simulate_series(east_champ, west_champ)
+    final_winner = simulate_series(east_champ, west_champ, league=league)
     all_rounds.extend([east_rounds, west_rounds, [(east_champ, west_champ, final_winner)]])
     return all_rounds, final_winner, {"east": east_rounds, "west": west_rounds, "final": (east_champ, west_champ, final_winner)}
 
-def simulate_season(eastern_teams, western_teams):
+@instrumentation.timed("simulate_season")
+def simulate_season(eastern_teams, western_teams, playoff_teams=8):
     all_teams = eastern_teams + western_teams
-    results = simulate_regular_season(all_teams)
+    league = compile_league(tuple(eastern_teams), tuple(western_teams))
+    results = simulate_regular_season(all_teams, league)
     standings = get_standings(results)
 
-    east = [t["name"] for t in standings if t["conference"] == "East" and t["name"] in eastern_teams][:8]
-    west = [t["name"] for t in standings if t["conference"] == "West" and t["name"] in western_teams][:8]
+    east = results.conference_ranking("East")[:playoff_teams]
+    west = results.conference_ranking("West")[:playoff_teams]
 
-    playoff_results, champion, bracket_data = simulate_playoffs(east, west)
+    playoff_results, champion, bracket_data = simulate_playoffs(east, west, league)
     return standings, bracket_data, champion
 
+# ===== BATCH SIMULATION =====
+
+BATCH_CHUNK = 4096
+# Bigger leagues get fewer seasons per chunk, so every chunk samples about as
+# many pairings as BATCH_CHUNK seasons of the 24-team league.
+BATCH_PAIRINGS = BATCH_CHUNK * 276
+# Small leagues sum wins with a dense pairing-by-team matmul; past this many
+# entries the matrix gets too big and a bincount scatter is used instead.
+INCIDENCE_LIMIT = 1 << 20
+
+def _series_length(best_of, rnd):
+    return best_of if isinstance(best_of, int) else best_of[min(rnd, len(best_of) - 1)]
+
+def _simulate_series_batch(team1, team2, win_prob, best_of, rng):
+    # A best-of-n series is won by whoever takes the majority of all n games,
+    # so playing every game at once gives the same winner distribution.
+    p = win_prob[team1, team2]
+    instrumentation.count(series=p.size, rng_draws=p.size * best_of)
+    wins1 = (rng.random(p.shape + (best_of,)) < p[..., None]).sum(axis=-1)
+    return np.where(wins1 > best_of // 2, team1, team2)
+
+def _simulate_side_batch(seeded, win_prob, best_of, rng, first_round=0):
+    rounds, losers = [], []
+    current = seeded
+    while current.shape[1] > 1:
+        byes = _num_byes(current.shape[1])
+        playing = current[:, byes:]
+        half = playing.shape[1] // 2
+        team1, team2 = playing[:, :half], playing[:, ::-1][:, :half]
+        winners = _simulate_series_batch(team1, team2, win_prob, _series_length(best_of, first_round + len(rounds)), rng)
+        rounds.append(winners)
+        losers.append(team1 + team2 - winners)
+        current = np.concatenate([current[:, :byes], winners], axis=1)
+    return rounds, losers, current[:, 0]
+
+def _simulate_playoffs_batch(conference_seeds, win_prob, best_of, rng, sort_key=None):
+    # Returns series winners and losers, one column per series in the same
+    # order (each conference round by round, then the final rounds), and the champion.
+    rounds, losers, champions = [], [], []
+    for seeded in conference_seeds:
+        side_rounds, side_losers, champion = _simulate_side_batch(seeded, win_prob, best_of, rng)
+        rounds.extend(side_rounds)
+        losers.extend(side_losers)
+        champions.append(champion)
+    champions = np.stack(champions, axis=1)
+    if sort_key is not None and champions.shape[1] > 2:
+        # Conference champions are reseeded by regular-season record.
+        order = np.argsort(-np.take_along_axis(sort_key, champions, axis=1), axis=1, kind="stable")
+        champions = np.take_along_axis(champions, order, axis=1)
+    conference_rounds = max((seeded.shape[1] - 1).bit_length() for seeded in conference_seeds)
+    final_rounds, final_losers, champion = _simulate_side_batch(champions, win_prob, best_of, rng,
+                                                                first_round=conference_rounds)
+    rounds.extend(final_rounds)
+    losers.extend(final_losers)
+    if not rounds:
+        empty = np.zeros((len(champion), 0), dtype=champion.dtype)
+        return empty, empty, champion
+    return np.concatenate(rounds, axis=1), np.concatenate(losers, axis=1), champion
+
+def _compile_schedule(league, pair_i, pair_j, meetings):
+    pair_prob = league.win_prob[pair_i, pair_j]
+    incidence = None
+    if len(pair_prob) * len(league.teams) <= INCIDENCE_LIMIT:
+        incidence = np.zeros((len(pair_prob), len(league.teams)))
+        incidence[np.arange(len(pair_prob)), pair_i] = 1
+        incidence[np.arange(len(pair_prob)), pair_j] = -1
+    return pair_i, pair_j, meetings, pair_prob, incidence
+
+def _simulate_regular_season_batch(n, schedule, num_teams, rng):
+    pair_i, pair_j, meetings, pair_prob, incidence = schedule
+    if len(pair_prob) == 0:
+        return np.zeros((n, num_teams), dtype=np.int64)
+    max_meetings = int(meetings.max())
+    instrumentation.count(games=n * int(meetings.sum()), rng_draws=n * max_meetings * len(pair_prob))
+    # Wins of the first team in each pairing across all of its meetings.
+    won = rng.random((n, max_meetings, len(pair_prob))) < pair_prob
+    if meetings.min() != max_meetings:
+        won &= np.arange(max_meetings)[:, None] < meetings
+    first_wins = won.sum(axis=1)
+    if incidence is not None:
+        return (first_wins @ incidence).astype(np.int64) + np.bincount(pair_j, weights=meetings, minlength=num_teams).astype(np.int64)
+    offsets = (np.arange(n) * num_teams)[:, None]
+    wins = np.bincount((offsets + pair_i).ravel(), weights=first_wins.ravel(), minlength=n * num_teams)
+    wins += np.bincount((offsets + pair_j).ravel(), weights=(meetings - first_wins).ravel(), minlength=n * num_teams)
+    return wins.reshape(n, num_teams).astype(np.int64)
+
+def _seed_conference(sort_key, conf_idx, playoff_teams):
+    order = np.argsort(-sort_key[:, conf_idx], axis=1, kind="stable")
+    return conf_idx[order[:, :playoff_teams]]
+
+def simulate_playoffs_batch(east, west, n_seasons, rng=None, best_of=9):
+    rng = np.random.default_rng(rng)
+    league = compile_league(tuple(east), tuple(west))
+    seeded = [np.broadcast_to(ids, (n_seasons, len(ids))) for ids in league.conference_ids.values()]
+    series_winners, series_losers, champions = _simulate_playoffs_batch(seeded, league.win_prob, best_of, rng)
+    return {"teams": list(league.teams), "champions": champions, "series_winners": series_winners,
+            "series_losers": series_losers}
+
+@instrumentation.timed("simulate_league_batch")
+def simulate_league_batch(config, n_seasons, rng=None):
+    league = config.league
+    schedule = _compile_schedule(league, *round_robin_schedule(league, config.intra_meetings, config.inter_meetings))
+    no_games = np.zeros(len(league.teams), dtype=np.int64)
+    return _simulate_league(config, schedule, no_games, no_games, league.win_prob, n_seasons, rng)
+
+def _simulate_league(config, schedule, fixed_wins, fixed_games, playoff_prob, n_seasons, rng):
+    # Runs the scheduled games on top of results already fixed, then the playoffs
+    # with playoff_prob, in which decided series can be pinned to 1 or 0. With
+    # playoff_prob None the playoffs are only seeded, not played.
+    rng = np.random.default_rng(rng)
+    league = config.league
+    num_teams = len(league.teams)
+    pair_i, pair_j, meetings, pair_prob, _ = schedule
+    games = fixed_games + np.bincount(pair_i, weights=meetings, minlength=num_teams) + np.bincount(pair_j, weights=meetings, minlength=num_teams)
+    sizes = {name: config.playoff_size(name) for name in league.conferences}
+
+    wins = np.zeros((n_seasons, num_teams), dtype=np.int64)
+    conference_seeds = {name: np.zeros((n_seasons, size), dtype=np.int64) for name, size in sizes.items()}
+    series_winners = series_losers = None
+    champions = np.zeros(n_seasons, dtype=np.int64)
+    chunk_size = max(1, BATCH_PAIRINGS // max(1, len(pair_prob)))
+    for start in range(0, n_seasons, chunk_size):
+        chunk = slice(start, min(start + chunk_size, n_seasons))
+        wins[chunk] = fixed_wins + _simulate_regular_season_batch(chunk.stop - chunk.start, schedule, num_teams, rng)
+        # Same points-then-name key as SeasonResults.ranking.
+        sort_key = 3 * wins[chunk] * num_teams + (num_teams - 1 - league.name_rank)
+        for name, ids in league.conference_ids.items():
+            conference_seeds[name][chunk] = _seed_conference(sort_key, ids, sizes[name])
+        if playoff_prob is None:
+            continue
+        chunk_series, chunk_losers, champions[chunk] = _simulate_playoffs_batch(
+            [conference_seeds[name][chunk] for name in league.conferences], playoff_prob, config.best_of, rng, sort_key
+        )
+        if series_winners is None:
+            series_winners = np.zeros((n_seasons, chunk_series.shape[1]), dtype=np.int64)
+            series_losers = np.zeros_like(series_winners)
+        series_winners[chunk] = chunk_series
+        series_losers[chunk] = chunk_losers
+
+    max_seed = max(sizes.values())
+    seeds = np.zeros((n_seasons, num_teams), dtype=np.int8 if max_seed < 128 else np.int16)
+    rows = np.arange(n_seasons)[:, None]
+    for name, seeded in conference_seeds.items():
+        seeds[rows, seeded] = np.arange(1, sizes[name] + 1)
+    return {
+        "teams": list(league.teams),
+        "conferences": list(league.conferences),
+        "champions": champions,
+        "seeds": seeds,
+        "conference_seeds": conference_seeds,
+        "wins": wins,
+        "losses": games.astype(np.int64) - wins,
+        "games": games.astype(np.int64),
+        "series_winners": series_winners if series_winners is not None else np.zeros((0, 0), dtype=np.int64),
+        "series_losers": series_losers if series_losers is not None else np.zeros((0, 0), dtype=np.int64),
+    }
+
+@instrumentation.timed("simulate_season_batch")
+def simulate_season_batch(n_seasons, eastern_teams=None, western_teams=None, rng=None, best_of=9, playoff_teams=8):
+    if eastern_teams is None or western_teams is None:
+        eastern_teams, western_teams = generate_teams()
+    config = _default_config(tuple(eastern_teams), tuple(western_teams), best_of, playoff_teams)
+    result = simulate_league_batch(config, n_seasons, rng=rng)
+    result["east_seeds"] = result["conference_seeds"]["East"]
+    result["west_seeds"] = result["conference_seeds"]["West"]
+    return result
+
+# ===== PARALLEL SIMULATION =====
+
+PARALLEL_SHARD = 2000
+
+def tally_seasons(result):
+    num_teams = len(result["teams"])
+    playoff_teams = max(seeded.shape[1] for seeded in result["conference_seeds"].values())
+    max_wins = int(result["games"].max())
+    team_ids = np.arange(num_teams)
+    seed_counts = np.bincount(
+        (team_ids * (playoff_teams + 1) + result["seeds"]).ravel(), minlength=num_teams * (playoff_teams + 1)
+    )
+    win_counts = np.bincount(
+        (team_ids * (max_wins + 1) + result["wins"]).ravel(), minlength=num_teams * (max_wins + 1)
+    )
+    return {
+        "seasons": len(result["champions"]),
+        "champion_counts": np.bincount(result["champions"], minlength=num_teams),
+        "seed_counts": seed_counts.reshape(num_teams, playoff_teams + 1),
+        "win_counts": win_counts.reshape(num_teams, max_wins + 1),
+    }
+
+def merge_tallies(tallies):
+    merged = {}
+    for tally in tallies:
+        for key, value in tally.items():
+            merged[key] = merged[key] + value if key in merged else value
+    return merged
+
+def _run_shard(shard):
+    seed_seq, n_seasons, eastern_teams, western_teams = shard
+    result = simulate_season_batch(n_seasons, eastern_teams, western_teams, rng=np.random.default_rng(seed_seq))
+    return tally_seasons(result)
+
+def simulate_seasons_parallel(n_seasons, seed=None, workers=None, eastern_teams=None, western_teams=None,
+                              shard_size=PARALLEL_SHARD):
+    if n_seasons < 1:
+        raise ValueError("n_seasons must be at least 1")
+    if eastern_teams is None or western_teams is None:
+        eastern_teams, western_teams = generate_teams()
+    # Shards and their spawned streams depend only on the seed and n_seasons,
+    # never on the worker count, so any pool size gives identical totals.
+    master = np.random.SeedSequence(seed)
+    sizes = [min(shard_size, n_seasons - start) for start in range(0, n_seasons, shard_size)]
+    shards = [(child, size, eastern_teams, western_teams) for child, size in zip(master.spawn(len(sizes)), sizes)]
+    if workers == 1:
+        tallies = list(map(_run_shard, shards))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tallies = list(pool.map(_run_shard, shards))
+    totals = merge_tallies(tallies)
+    totals["teams"] = list(eastern_teams) + list(western_teams)
+    totals["seed"] = master.entropy
+    return totals
+
+# ===== STREAMING ESTIMATES =====
+
+def wilson_interval(p, n, z=1.96):
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return center - half_width, center + half_width
+
+def stream_season_odds(chunk_size=2000, precision=0.005, time_budget=None, max_seasons=None, seed=None,
+                       eastern_teams=None, western_teams=None, z=1.96):
+    # Yields running estimates after every chunk until each interval is within
+    # +/- precision, the time budget runs out or max_seasons have been played.
+    if max_seasons is not None and max_seasons < 1:
+        raise ValueError("max_seasons must be at least 1")
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    totals = None
+    while True:
+        size = chunk_size
+        if max_seasons is not None:
+            # The last chunk is cut short so exactly max_seasons are played.
+            size = min(chunk_size, max_seasons - (totals["seasons"] if totals else 0))
+        result = simulate_season_batch(size, eastern_teams, western_teams, rng=rng)
+        tally = tally_seasons(result)
+        totals = merge_tallies([totals, tally]) if totals else tally
+        n = totals["seasons"]
+        estimates = {
+            "champion": totals["champion_counts"] / n,
+            "playoffs": 1 - totals["seed_counts"][:, 0] / n,
+            "seeds": totals["seed_counts"][:, 1:] / n,
+        }
+        intervals = {name: wilson_interval(p, n, z) for name, p in estimates.items()}
+        max_half_width = max(float(np.max(high - low)) / 2 for low, high in intervals.values())
+        elapsed = time.perf_counter() - started
+        converged = max_half_width <= precision
+        yield {
+            "teams": result["teams"],
+            "seasons": n,
+            "elapsed": elapsed,
+            "estimates": estimates,
+            "intervals": intervals,
+            "max_half_width": max_half_width,
+            "converged": converged,
+        }
+        if converged or (time_budget is not None and elapsed >= time_budget) or (max_seasons is not None and n >= max_seasons):
+            return
+
+# ===== EXACT PLAYOFF ODDS =====
+
+def series_win_probability(p, best_of=9):
+    # Win the clinching game after losing j of the other games, for every j < needed.
+    needed = best_of // 2 + 1
+    return sum(comb(needed - 1 + j, j) * p ** needed * (1 - p) ** j for j in range(needed))
+
+def _advance_side(slots, series_probs, first_round=0):
+    # series_probs holds one series-win matrix per round; the last one repeats.
+    reach = []
+    while len(slots) > 1:
+        byes = _num_byes(len(slots))
+        playing = slots[byes:]
+        series_prob = series_probs[min(first_round + len(reach), len(series_probs) - 1)]
+        slots = slots[:byes] + [
+            playing[i] * (playing[-(i + 1)] @ series_prob.T) + playing[-(i + 1)] * (playing[i] @ series_prob.T)
+            for i in range(len(playing) // 2)
+        ]
+        reach.append(sum(slots))
+    return reach, slots[0]
+
+def _bracket_reach(east_ids, west_ids, win_prob, best_of=9):
+    # Rows are P(reach round 1), ..., P(reach final), P(win final) over every team ID.
+    # Seeds given as (brackets, seeds) arrays give rows of shape (brackets, teams).
+    lengths = [best_of] if isinstance(best_of, int) else best_of
+    series_probs = [series_win_probability(win_prob, length) for length in lengths]
+    east_slots = np.moveaxis(np.eye(len(win_prob))[east_ids], -2, 0)
+    west_slots = np.moveaxis(np.eye(len(win_prob))[west_ids], -2, 0)
+    east_reach, east_champ = _advance_side(list(east_slots), series_probs)
+    west_reach, west_champ = _advance_side(list(west_slots), series_probs)
+    conference_rounds = max(len(east_reach), len(west_reach))
+    final_prob = series_probs[min(conference_rounds, len(series_probs) - 1)]
+    champion = east_champ * (west_champ @ final_prob.T) + west_champ * (east_champ @ final_prob.T)
+    east_playoffs, west_playoffs = east_slots.sum(axis=0), west_slots.sum(axis=0)
+    # Rounds line up from the final back, so a smaller side's teams reach the
+    # rounds before its own first one just by making the playoffs.
+    east_reach = [east_playoffs] * (conference_rounds - len(east_reach)) + east_reach
+    west_reach = [west_playoffs] * (conference_rounds - len(west_reach)) + west_reach
+    return [east_playoffs + west_playoffs] + [e + w for e, w in zip(east_reach, west_reach)] + [champion]
+
+def bracket_probabilities(east, west, best_of=9):
+    # Each entry is [P(reach round 1), ..., P(reach final), P(win final)].
+    league = compile_league(tuple(east), tuple(west))
+    ids = np.arange(len(league.teams))
+    reach = _bracket_reach(ids[:len(east)], ids[len(east):], league.win_prob, best_of)
+    return {team: [float(r[t]) for r in reach] for t, team in enumerate(league.teams)}
+
 # ===== BETTING SYSTEM =====
 
-def calculate_odds(team, seed):
-    tier = get_tier(team)
+def calculate_odds(team, seed, league=None):
+    tier = (_default_league() if league is None else league).tier_of(team)
     base_odds = {'A': 2.0, 'B': 3.5, 'C': 6.0, 'D': 9.0}
     odds = base_odds.get(tier, 5.0)
     if seed >= 5:
@@ -117,101 +684,157 @@ def calculate_odds(team, seed):
         odds *= 1.2
     return round(odds, 2)
 
+ODDS_SEASONS = 20000
+ODDS_SEED = 0
+
+@lru_cache(maxsize=64)
+def _title_probabilities(east, west, method, n_seasons, seed, tier_key):
+    if method == "exact":
+        probabilities = bracket_probabilities(east, west)
+        return tuple(probabilities[team][-1] for team in east + west)
+    result = simulate_playoffs_batch(east, west, n_seasons, rng=seed)
+    counts = np.bincount(result["champions"], minlength=len(result["teams"]))
+    return tuple(float(c) for c in counts / n_seasons)
+
+def championship_odds(east, west, method="exact", n_seasons=ODDS_SEASONS, seed=ODDS_SEED):
+    # Cached per seeded bracket, so Streamlit reruns reuse the same prices.
+    east, west = tuple(east), tuple(west)
+    return dict(zip(east + west, _title_probabilities(east, west, method, n_seasons, seed, _tier_key())))
+
+def odds_from_probability(probability, n_seasons=ODDS_SEASONS):
+    # Outcomes never seen in the sample are priced as if they happened once.
+    return round(1 / max(probability, 1 / n_seasons), 2)
+
+# ===== VARIANCE REDUCTION =====
+
+VARIANCE_METHODS = ("plain", "antithetic", "importance")
+# Importance sampling plays the regular season as if every strength were raised
+# to this power, which pulls each matchup toward a coin flip so long shots make
+# the playoffs more often. It stays mild: over hundreds of games a strong tilt
+# would leave a handful of seasons carrying all the weight.
+SEASON_TILT = 0.9
+# Teams that reach the playoffs in fewer sampled seasons than this get no ESS.
+MIN_HITS = 10
+
+class _MirroredGenerator(np.random.Generator):
+    # Hands out 1 - u for every uniform u the same seed would produce, so a run
+    # with it is the antithetic twin of a run with the plain generator.
+    def random(self, size=None, dtype=np.float64, out=None):
+        return 1.0 - super().random(size, dtype, out)
+
+def _tilt(win_prob, tilt):
+    return win_prob ** tilt / (win_prob ** tilt + win_prob.T ** tilt)
+
+def _season_log_weights(league, schedule, sampled_prob, wins, tilt):
+    # Log likelihood ratio of the regular season. For a pairing met m times with
+    # k wins it is k * (logit p - logit q) + m * log((1 - p) / (1 - q)), and
+    # logit p - logit q = (1 - tilt) * (log s_i - log s_j), so the k terms
+    # collapse onto each team's win total.
+    pair_i, pair_j, meetings, pair_prob, _ = schedule
+    log_strength = np.log([league.strength[tier] for tier in league.tier])
+    constant = np.sum(meetings * (np.log1p(-pair_prob) - np.log1p(-sampled_prob) - (1 - tilt) * log_strength[pair_j]))
+    return (1 - tilt) * (wins @ log_strength) + constant
+
+def estimate_title_odds(config=None, n_seasons=ODDS_SEASONS, seed=None, method="plain", tilt=SEASON_TILT):
+    # Each estimate comes with its standard error and effective sample size: how
+    # many plain independent seasons would give the same precision.
+    if method not in VARIANCE_METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {', '.join(VARIANCE_METHODS)}")
+    config = config or _default_config(*map(tuple, generate_teams()), 9, 8)
+    league = config.league
+    num_teams = len(league.teams)
+    seed = np.random.SeedSequence(seed)
+    estimate = {"teams": list(league.teams), "method": method, "seed": seed.entropy}
+
+    if method == "antithetic":
+        # Season k of the plain run and season k of the mirrored run form a pair.
+        half = max(1, n_seasons // 2)
+        first = simulate_league_batch(config, half, rng=np.random.Generator(np.random.PCG64(seed)))["champions"]
+        second = simulate_league_batch(config, half, rng=_MirroredGenerator(np.random.PCG64(seed)))["champions"]
+        counts = np.bincount(first, minlength=num_teams) + np.bincount(second, minlength=num_teams)
+        both = np.bincount(first[first == second], minlength=num_teams)
+        p = counts / (2 * half)
+        variance = ((counts + 2 * both) / (4 * half) - p ** 2) / half
+        estimate["seasons"] = 2 * half
+    elif method == "importance":
+        # Only the regular season is sampled, from the tilted probabilities. Each
+        # season then adds every team's exact title probability given its seeding
+        # (the bracket DP), so a long shot that makes the playoffs contributes its
+        # small chance of winning from there instead of almost never a title.
+        if len(league.conferences) != 2:
+            raise ValueError("importance sampling needs two conferences")
+        schedule = _compile_schedule(league, *round_robin_schedule(league, config.intra_meetings, config.inter_meetings))
+        season_prob = _tilt(league.win_prob, tilt)[schedule[0], schedule[1]]
+        no_games = np.zeros(num_teams, dtype=np.int64)
+        result = _simulate_league(config, schedule[:3] + (season_prob,) + schedule[4:], no_games, no_games, None,
+                                  n_seasons, np.random.Generator(np.random.PCG64(seed)))
+        log_weight = _season_log_weights(league, schedule, season_prob, result["wins"], tilt)
+        # Estimates are self-normalized, so shifting by the max only guards against overflow.
+        weights = np.exp(log_weight - log_weight.max())
+        east_seeds, west_seeds = result["conference_seeds"].values()
+        # Per team: sums of w * c, (w * c)^2 and w^2 * c over seasons, where c is the
+        # title probability given that season's seeding, and its playoff seasons.
+        sums = np.zeros((3, num_teams))
+        hits = np.zeros(num_teams, dtype=np.int64)
+        for start in range(0, n_seasons, BATCH_CHUNK):
+            chunk = slice(start, start + BATCH_CHUNK)
+            title = _bracket_reach(east_seeds[chunk], west_seeds[chunk], league.win_prob, config.best_of)[-1]
+            weighted = weights[chunk, None] * title
+            sums += [weighted.sum(axis=0), (weighted ** 2).sum(axis=0), (weights[chunk, None] * weighted).sum(axis=0)]
+            hits += (title > 0).sum(axis=0)
+        total, squared = weights.sum(), (weights ** 2).sum()
+        # Self-normalized estimate, with its delta-method variance.
+        p = sums[0] / total
+        variance = (sums[1] - 2 * p * sums[2] + p ** 2 * squared) / total ** 2
+        estimate["seasons"] = n_seasons
+        estimate["hits"] = hits
+        estimate["weight_ess"] = float(total ** 2 / squared)
+    else:
+        champions = simulate_league_batch(config, n_seasons, rng=np.random.Generator(np.random.PCG64(seed)))["champions"]
+        p = np.bincount(champions, minlength=num_teams) / n_seasons
+        variance = p * (1 - p) / n_seasons
+        estimate["seasons"] = n_seasons
+
+    variance = np.maximum(variance, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ess = np.where(variance > 0, p * (1 - p) / variance, np.nan)
+    if method == "importance":
+        # Too few playoff seasons behind an estimate make its variance unreliable.
+        ess = np.where(estimate["hits"] >= MIN_HITS, ess, np.nan)
+    estimate["ess"] = ess
+    estimate["estimates"] = p
+    estimate["std_errors"] = np.sqrt(variance)
+    return estimate
+
+def compare_title_odds(config_a, config_b, n_seasons=ODDS_SEASONS, seed=None):
+    # Both configs consume the same random stream (common random numbers), so
+    # their seasons are paired and luck they share cancels out of the difference.
+    if config_a.league.teams != config_b.league.teams:
+        raise ValueError("compared configs must have the same teams in the same order")
+    seed = np.random.SeedSequence(seed)
+    num_teams = len(config_a.league.teams)
+    first = simulate_league_batch(config_a, n_seasons, rng=np.random.Generator(np.random.PCG64(seed)))["champions"]
+    second = simulate_league_batch(config_b, n_seasons, rng=np.random.Generator(np.random.PCG64(seed)))["champions"]
+    p_a = np.bincount(first, minlength=num_teams) / n_seasons
+    p_b = np.bincount(second, minlength=num_teams) / n_seasons
+    both = np.bincount(first[first == second], minlength=num_teams) / n_seasons
+    difference = p_a - p_b
+    variance = np.maximum((p_a + p_b - 2 * both - difference ** 2) / n_seasons, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Independent season pairs needed for the same standard error without pairing.
+        ess = np.where(variance > 0, (p_a * (1 - p_a) + p_b * (1 - p_b)) / variance, np.nan)
+    return {
+        "teams": list(config_a.league.teams),
+        "seasons": n_seasons,
+        "seed": seed.entropy,
+        "estimates": (p_a, p_b),
+        "difference": difference,
+        "std_errors": np.sqrt(variance),
+        "ess": ess,
+    }
+
 # ===== BRACKET DRAWING =====
+@instrumentation.timed("draw_nba_bracket")
 def draw_nba_bracket(east_bracket, west_bracket, finals, highlight_team=None):
-    import matplotlib.pyplot as plt
-    from matplotlib.patches import Rectangle
-
-    fig, ax = plt.subplots(figsize=(18, 10))
-    ax.axis('off')
-
-    box_w, box_h = 3, 1
-    gap_y = 1.5
-    round_gap_x = 4
-
-    # Normalize function for matching
-    def normalize(name):
-        return name.strip().lower().replace(" ", "") if name else ""
-
-    norm_highlight = normalize(highlight_team)
-
-    def draw_conference(bracket, x_start, direction):
-        num_rounds = len(bracket)
-        team_boxes = {}
-
-        for rnd in range(num_rounds):
-            match_spacing = gap_y * (2 ** rnd)
-            for i, (team1, team2, winner) in enumerate(bracket[rnd]):
-                y1 = i * match_spacing * 2
-                y2 = y1 + match_spacing
-                x = x_start + direction * rnd * round_gap_x
-
-                ax.add_patch(Rectangle((x, y1), box_w, box_h, fill=False))
-                ax.add_patch(Rectangle((x, y2), box_w, box_h, fill=False))
-
-                norm_team1 = normalize(team1)
-                norm_team2 = normalize(team2)
-
-                color1 = 'red' if norm_highlight == norm_team1 else 'black'
-                color2 = 'red' if norm_highlight == norm_team2 else 'black'
-
-                ax.text(x + 0.15, y1 + box_h / 2, team1, va='center', ha='left', fontsize=7, color=color1)
-                ax.text(x + 0.15, y2 + box_h / 2, team2, va='center', ha='left', fontsize=7, color=color2)
-
-                team_boxes[(rnd, i)] = (x, y1, y2)
-
-                x0 = x + box_w if direction == 1 else x
-                x1 = x0 + direction * 0.5
-                ax.plot([x0, x1], [y1 + box_h / 2, y1 + box_h / 2], color='black')
-                ax.plot([x0, x1], [y2 + box_h / 2, y2 + box_h / 2], color='black')
-                ax.plot([x1, x1], [y1 + box_h / 2, y2 + box_h / 2], color='black')
-
-        last_round = num_rounds - 1
-        final_match = bracket[last_round][0]
-        final_y = (team_boxes[(last_round, 0)][1] + team_boxes[(last_round, 0)][2]) / 2
-        final_winner = final_match[2]
-        final_x = team_boxes[(last_round, 0)][0]
-        return final_winner, final_y, final_x, team_boxes, last_round
-
-    # Draw East and West
-    ax.text(1, 18, "Eastern Conference", fontsize=13, weight='bold')
-    east_champ, y_east, x_east, east_team_boxes, east_final_round = draw_conference(east_bracket, x_start=2, direction=1)
-
-    ax.text(29, 18, "Western Conference", fontsize=13, weight='bold', ha='right')
-    west_champ, y_west, x_west, west_team_boxes, west_final_round = draw_conference(west_bracket, x_start=28 - box_w, direction=-1)
-
-    # Conference Champion Labels
-    def place_conference_label(team_boxes, final_round, champ_name):
-        finals = [v for k, v in team_boxes.items() if k[0] == final_round]
-        if len(finals) >= 2:
-            finals.sort(key=lambda b: b[1])
-            left, right = finals[0], finals[1]
-            label_x = (left[0] + right[0] + box_w) / 2
-            label_y = (left[1] + right[2]) / 2
-            ax.text(label_x, label_y, f"{champ_name}", fontsize=9, fontweight='bold', ha='center', va='center')
-
-    place_conference_label(east_team_boxes, east_final_round, f"Eastern Conference Champion:\n{east_champ}")
-    place_conference_label(west_team_boxes, west_final_round, f"Western Conference Champion:\n{west_champ}")
-
-    # Draw Finals
-    finals_x = 15
-    finals_y = (y_east + y_west) / 2
-
-    ax.text(finals_x, finals_y + 6, "Finals", fontsize=14, weight='bold', ha='center')
-
-    team1, team2, champ = finals
-    norm_team1 = normalize(team1)
-    norm_team2 = normalize(team2)
-    norm_champ = normalize(champ)
-
-    color_final_1 = 'red' if norm_highlight == norm_team1 else 'black'
-    color_final_2 = 'red' if norm_highlight == norm_team2 else 'black'
-    color_champ = 'red' if norm_highlight == norm_champ else 'black'
-
-    ax.text(finals_x, finals_y + 5, f"{team1} vs {team2}", fontsize=10, ha='center',
-            color='red' if norm_highlight in [norm_team1, norm_team2] else 'black')
-    ax.text(finals_x, finals_y + 4.25, f"Winner: {champ}", fontsize=10, fontweight='bold',
-            ha='center', color=color_champ)
-
-    plt.tight_layout()
-    return fig
\ No newline at end of file
+    from bracket import draw_bracket_figure
+    return draw_bracket_figure(east_bracket, west_bracket, finals, highlight_team)
@@ -0,0 +1,171 @@
+import json
+import os
+
+import numpy as np
+
+import simulator
+
+# Column name -> dtype; every column is (seasons,) or (seasons, width).
+COLUMNS = {
+    "champion": "<i2",
+    "wins": "<i2",
+    "losses": "<i2",
+    "points": "<i2",
+    "seeds": "<i1",
+    "series_winners": "<i2",
+}
+SCAN_ROWS = 1 << 18
+
+class SeasonStore:
+    # One raw little-endian file per column plus meta.json. The row count in
+    # meta.json is only advanced after the column files are flushed, so readers
+    # never see a half-written season while a run is still appending.
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.index = {team: i for i, team in enumerate(self.meta["teams"])}
+
+    @classmethod
+    def create(cls, path, eastern_teams=None, western_teams=None, playoff_teams=8):
+        if eastern_teams is None or western_teams is None:
+            eastern_teams, western_teams = simulator.generate_teams()
+        league = simulator.compile_league(tuple(eastern_teams), tuple(western_teams))
+        num_teams = len(league.teams)
+        # Per-round column ranges of series_winners, east then west, then the final.
+        rounds, start, remaining = [], 0, playoff_teams
+        while remaining > 1:
+            matches = (remaining - simulator._num_byes(remaining)) // 2
+            rounds.append([start, start + matches])
+            start += matches
+            remaining -= matches
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "teams": league.teams,
+            "tiers": [str(tier) for tier in league.tier],
+            "conferences": [str(conference) for conference in league.conference],
+            "playoff_teams": playoff_teams,
+            "rounds": rounds,
+            "num_series": 2 * start + 1,
+            "widths": {"champion": None, "wins": num_teams, "losses": num_teams, "points": num_teams,
+                       "seeds": num_teams, "series_winners": 2 * start + 1},
+            "rows": 0,
+        }
+        for name in COLUMNS:
+            open(os.path.join(path, f"{name}.bin"), "wb").close()
+        cls._write_meta(path, meta)
+        store = cls(path)
+        store._truncate_columns()
+        return store
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def refresh(self):
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta["rows"] = json.load(f)["rows"]
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    # ===== WRITING =====
+
+    def _truncate_columns(self):
+        # Drops bytes past meta["rows"] left by an append that died before the
+        # row count was advanced, so every column starts the next append aligned.
+        # Only writers do this: a reader opening the store mid-append must not
+        # cut off rows that are still being written.
+        for name, dtype in COLUMNS.items():
+            row_bytes = np.dtype(dtype).itemsize * (self.meta["widths"][name] or 1)
+            os.truncate(os.path.join(self.path, f"{name}.bin"), self.meta["rows"] * row_bytes)
+
+    def append(self, result):
+        if result["teams"] != self.meta["teams"]:
+            raise ValueError("batch teams do not match the store's league")
+        self._truncate_columns()
+        columns = {
+            "champion": result["champions"],
+            "wins": result["wins"],
+            "losses": result["losses"],
+            "points": 3 * result["wins"],
+            "seeds": result["seeds"],
+            "series_winners": result["series_winners"],
+        }
+        for name, values in columns.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                f.write(np.ascontiguousarray(values, dtype=COLUMNS[name]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self.meta["rows"] += len(result["champions"])
+        self._write_meta(self.path, self.meta)
+
+    def record(self, n_seasons, seed=None, chunk_size=simulator.BATCH_CHUNK):
+        rng = np.random.default_rng(seed)
+        conferences = self.meta["conferences"]
+        eastern_teams = [t for t, c in zip(self.meta["teams"], conferences) if c == "East"]
+        western_teams = [t for t, c in zip(self.meta["teams"], conferences) if c == "West"]
+        for start in range(0, n_seasons, chunk_size):
+            self.append(simulator.simulate_season_batch(
+                min(chunk_size, n_seasons - start), eastern_teams, western_teams, rng=rng,
+                playoff_teams=self.meta["playoff_teams"],
+            ))
+
+    # ===== READING =====
+
+    def column(self, name):
+        width = self.meta["widths"][name]
+        shape = (len(self),) if width is None else (len(self), width)
+        if len(self) == 0:
+            return np.zeros(shape, dtype=COLUMNS[name])
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=COLUMNS[name], mode="r", shape=shape)
+
+    def _chunks(self, *names):
+        columns = [self.column(name) for name in names]
+        for start in range(0, len(self), SCAN_ROWS):
+            yield [np.asarray(column[start:start + SCAN_ROWS]) for column in columns]
+
+    def team_id(self, team):
+        return self.index[team]
+
+    def _reached(self, team_id, reached_round, seeds, series_winners, champion):
+        # Rounds count from 1 like bracket_probabilities: 1 = made the playoffs,
+        # len(rounds) + 1 = reached the final, len(rounds) + 2 = won it.
+        rounds = self.meta["rounds"]
+        if reached_round == 1:
+            return seeds[:, team_id] > 0
+        if reached_round == len(rounds) + 2:
+            return champion == team_id
+        start, stop = rounds[reached_round - 2]
+        offset = rounds[-1][1]
+        reached = ((series_winners[:, start:stop] == team_id).any(axis=1)
+                   | (series_winners[:, offset + start:offset + stop] == team_id).any(axis=1))
+        if reached_round == 2:
+            # Top seeds with a first-round bye reach the second round directly.
+            byes = simulator._num_byes(self.meta["playoff_teams"])
+            reached |= (seeds[:, team_id] > 0) & (seeds[:, team_id] <= byes)
+        return reached
+
+    def probability(self, team, reached_round, seed=None):
+        team_id = self.team_id(team)
+        hits = trials = 0
+        for seeds, series_winners, champion in self._chunks("seeds", "series_winners", "champion"):
+            given = seeds[:, team_id] == seed if seed is not None else np.ones(len(seeds), dtype=bool)
+            hits += int((self._reached(team_id, reached_round, seeds, series_winners, champion) & given).sum())
+            trials += int(given.sum())
+        return hits / trials if trials else float("nan")
+
+    def wins_distribution(self, tier=None, teams=None):
+        if teams is not None:
+            team_ids = [self.team_id(team) for team in teams]
+        else:
+            team_ids = [i for i, t in enumerate(self.meta["tiers"]) if tier is None or t == tier]
+        max_wins = 2 * (len(self.meta["teams"]) - 1)
+        counts = np.zeros(max_wins + 1, dtype=np.int64)
+        for (wins,) in self._chunks("wins"):
+            counts += np.bincount(wins[:, team_ids].ravel(), minlength=max_wins + 1)
+        return counts / counts.sum() if counts.sum() else counts.astype(float)